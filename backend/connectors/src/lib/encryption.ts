@@ -5,31 +5,74 @@
  * Industry standard for token storage
  */
 
-import { createCipheriv, createDecipheriv, randomBytes, scryptSync } from "crypto";
+import { createCipheriv, createDecipheriv, randomBytes, scrypt } from "crypto";
+import { promisify } from "util";
+
+const scryptAsync = promisify(scrypt) as (
+  password: string,
+  salt: Buffer,
+  keylen: number,
+) => Promise<Buffer>;
 
 const ALGORITHM = "aes-256-gcm";
 const IV_LENGTH = 16;
 const AUTH_TAG_LENGTH = 16;
 const SALT_LENGTH = 32;
 
+// Ciphertext is at least salt + iv + authTag (88 base64 chars); shorter values are legacy plaintext
+const MIN_ENCRYPTED_LENGTH = 100;
+const BASE64_PATTERN = /^[A-Za-z0-9+/=]+$/;
+
 // Get encryption key from environment
 const ENCRYPTION_KEY = process.env.ENCRYPTION_KEY;
 
+// Derived keys for decryption, by salt. scrypt is deliberately slow, and a
+// stored token's salt is fixed, so pending derivations are shared by
+// concurrent decrypts of the same token. encrypt() always uses a fresh salt,
+// so its keys would never be read again and are not cached
+const KEY_CACHE_MAX_SIZE = 1000;
+const keyCache = new Map<string, Promise<Buffer>>();
+
 /**
  * Derive a key from the master key and salt
+ * scrypt runs on the libuv threadpool, off the event loop
  */
-function deriveKey(salt: Buffer): Buffer {
+function deriveKey(salt: Buffer): Promise<Buffer> {
   if (!ENCRYPTION_KEY) {
     throw new Error("ENCRYPTION_KEY not set in environment");
   }
-  return scryptSync(ENCRYPTION_KEY, salt, 32);
+
+  return scryptAsync(ENCRYPTION_KEY, salt, 32);
+}
+
+/**
+ * Derive the key for a stored value's salt, reusing recent derivations
+ */
+function deriveDecryptionKey(salt: Buffer): Promise<Buffer> {
+  const cacheKey = salt.toString("base64");
+  const cached = keyCache.get(cacheKey);
+  if (cached) {
+    return cached;
+  }
+
+  const key = deriveKey(salt);
+  key.catch(() => keyCache.delete(cacheKey));
+
+  // Evict the oldest entry (Map keeps insertion order)
+  if (keyCache.size >= KEY_CACHE_MAX_SIZE) {
+    const oldest = keyCache.keys().next().value;
+    if (oldest !== undefined) keyCache.delete(oldest);
+  }
+  keyCache.set(cacheKey, key);
+
+  return key;
 }
 
 /**
  * Encrypt sensitive text (tokens, secrets)
  * Returns base64 encoded string with salt:iv:authTag:ciphertext
  */
-export function encrypt(text: string): string {
+export async function encrypt(text: string): Promise<string> {
   if (!text) return text;
   
   try {
@@ -38,14 +81,14 @@ export function encrypt(text: string): string {
     const iv = randomBytes(IV_LENGTH);
     
     // Derive key
-    const key = deriveKey(salt);
+    const key = await deriveKey(salt);
     
     // Create cipher
     const cipher = createCipheriv(ALGORITHM, key, iv);
     
-    // Encrypt
-    let encrypted = cipher.update(text, "utf8", "hex");
-    encrypted += cipher.final("hex");
+    // Encrypt (kept as Buffers; no hex round-trip)
+    const encrypted = cipher.update(text, "utf8");
+    const final = cipher.final();
     
     // Get auth tag
     const authTag = cipher.getAuthTag();
@@ -55,7 +98,8 @@ export function encrypt(text: string): string {
       salt,
       iv,
       authTag,
-      Buffer.from(encrypted, "hex")
+      encrypted,
+      final,
     ]).toString("base64");
     
     return result;
@@ -65,13 +109,26 @@ export function encrypt(text: string): string {
   }
 }
 
+// Recently decrypted values by ciphertext. A re-encrypted token gets a new
+// salt and IV, so its ciphertext (and cache key) changes with it
+const PLAINTEXT_CACHE_MAX_SIZE = 1024;
+const plaintextCache = new Map<string, string>();
+
 /**
  * Decrypt encrypted text
  * Expects base64 encoded string with format: salt:iv:authTag:ciphertext
  */
-export function decrypt(encryptedData: string): string {
+export async function decrypt(encryptedData: string): Promise<string> {
   if (!encryptedData) return encryptedData;
   
+  const cached = plaintextCache.get(encryptedData);
+  if (cached !== undefined) {
+    // Move to the back so the least recently used entry is evicted first
+    plaintextCache.delete(encryptedData);
+    plaintextCache.set(encryptedData, cached);
+    return cached;
+  }
+  
   try {
     // Decode base64
     const data = Buffer.from(encryptedData, "base64");
@@ -83,7 +140,7 @@ export function decrypt(encryptedData: string): string {
     const encrypted = data.subarray(SALT_LENGTH + IV_LENGTH + AUTH_TAG_LENGTH);
     
     // Derive key
-    const key = deriveKey(salt);
+    const key = await deriveDecryptionKey(salt);
     
     // Create decipher
     const decipher = createDecipheriv(ALGORITHM, key, iv);
@@ -93,7 +150,15 @@ export function decrypt(encryptedData: string): string {
     let decrypted = decipher.update(encrypted);
     decrypted = Buffer.concat([decrypted, decipher.final()]);
     
-    return decrypted.toString("utf8");
+    const plaintext = decrypted.toString("utf8");
+    
+    if (plaintextCache.size >= PLAINTEXT_CACHE_MAX_SIZE) {
+      const oldest = plaintextCache.keys().next().value;
+      if (oldest !== undefined) plaintextCache.delete(oldest);
+    }
+    plaintextCache.set(encryptedData, plaintext);
+    
+    return plaintext;
   } catch (error) {
     console.error("Decryption failed:", error);
     throw new Error("Failed to decrypt sensitive data");
@@ -103,15 +168,15 @@ export function decrypt(encryptedData: string): string {
 /**
  * Encrypt an object (for JSON data)
  */
-export function encryptObject<T>(obj: T): string {
+export function encryptObject<T>(obj: T): Promise<string> {
   return encrypt(JSON.stringify(obj));
 }
 
 /**
  * Decrypt to object
  */
-export function decryptObject<T>(encryptedData: string): T {
-  const decrypted = decrypt(encryptedData);
+export async function decryptObject<T>(encryptedData: string): Promise<T> {
+  const decrypted = await decrypt(encryptedData);
   return JSON.parse(decrypted) as T;
 }
 
@@ -134,12 +199,12 @@ export function isEncryptionConfigured(): boolean {
  * Safely decrypt with fallback for unencrypted data (migration helper)
  * Use this during transition period when some data might not be encrypted yet
  */
-export function decryptSafe(encryptedData: string | null): string | null {
+export async function decryptSafe(encryptedData: string | null): Promise<string | null> {
   if (!encryptedData) return null;
   
   // Check if data looks encrypted (base64 and long enough)
-  const isEncrypted = encryptedData.length > 100 && 
-    /^[A-Za-z0-9+/=]+$/.test(encryptedData);
+  const isEncrypted = encryptedData.length > MIN_ENCRYPTED_LENGTH &&
+    BASE64_PATTERN.test(encryptedData);
   
   if (!isEncrypted) {
     // Data is not encrypted (legacy), return as-is
@@ -147,7 +212,7 @@ export function decryptSafe(encryptedData: string | null): string | null {
   }
   
   try {
-    return decrypt(encryptedData);
+    return await decrypt(encryptedData);
   } catch (error) {
     // If decryption fails, might be legacy data
     console.warn("Decryption failed, treating as plaintext:", error);
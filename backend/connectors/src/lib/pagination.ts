@@ -0,0 +1,24 @@
+/**
+ * Page parameters for list endpoints
+ *
+ * Clamps client-supplied limit/offset so a single request can never
+ * pull an unbounded number of rows into memory
+ */
+
+const DEFAULT_PAGE_SIZE = 50;
+const MAX_PAGE_SIZE = parseInt(process.env.MAX_PAGE_SIZE || "200");
+
+export interface Page {
+  limit: number;
+  offset: number;
+}
+
+export function parsePage(query: { limit?: string; offset?: string }): Page {
+  const limit = parseInt(query.limit || "") || DEFAULT_PAGE_SIZE;
+  const offset = parseInt(query.offset || "") || 0;
+
+  return {
+    limit: Math.min(Math.max(limit, 1), MAX_PAGE_SIZE),
+    offset: Math.max(offset, 0),
+  };
+}
@@ -16,10 +16,8 @@ import { encrypt, decrypt } from "./encryption";
  */
 export function generateCodeVerifier(): string {
   // Generate 32 bytes = 256 bits of entropy
-  // Base64url encode to get ~43 characters
-  return randomBytes(32)
-    .toString("base64url")
-    .replace(/=/g, "");
+  // Base64url encode to get 43 characters (Node's base64url is unpadded)
+  return randomBytes(32).toString("base64url");
 }
 
 /**
@@ -27,10 +25,7 @@ export function generateCodeVerifier(): string {
  * code_challenge = BASE64URL(SHA256(code_verifier))
  */
 export function generateCodeChallenge(verifier: string): string {
-  return createHash("sha256")
-    .update(verifier)
-    .digest("base64url")
-    .replace(/=/g, "");
+  return createHash("sha256").update(verifier).digest("base64url");
 }
 
 /**
@@ -102,7 +97,7 @@ export async function storePkceChallenge(
   const expiresAt = new Date(Date.now() + ttlMs);
   
   // Encrypt the code verifier before storing
-  const encryptedVerifier = encrypt(codeVerifier);
+  const encryptedVerifier = await encrypt(codeVerifier);
   
   await db.insert(schema.pkceChallenges).values({
     state,
@@ -134,7 +129,7 @@ export async function getPkceVerifier(state: string): Promise<{
   }
   
   // Check if expired
-  if (new Date() > challenge.expiresAt) {
+  if (Date.now() > challenge.expiresAt.getTime()) {
     await db.delete(schema.pkceChallenges)
       .where(eq(schema.pkceChallenges.id, challenge.id));
     return null;
@@ -145,7 +140,7 @@ export async function getPkceVerifier(state: string): Promise<{
     .where(eq(schema.pkceChallenges.id, challenge.id));
   
   // Decrypt the code verifier
-  const codeVerifier = decrypt(challenge.codeVerifier);
+  const codeVerifier = await decrypt(challenge.codeVerifier);
   
   return {
     codeVerifier,
@@ -9,16 +9,26 @@
 import { db, schema } from "@backend/db";
 import { eq } from "drizzle-orm";
 import { encrypt, decrypt } from "./encryption";
+import { TtlCache } from "./ttl-cache";
 
 const { slackConnections } = schema;
 
+// Slack team ID -> owning user ID, for attributing incoming events. Every
+// event batch needs this and it rarely changes, so skip the query for
+// recently seen teams. Only linked teams are cached, and anything that
+// writes a team's connection deletes its entry
+export const teamUserCache = new TtlCache<string, string>(
+  parseInt(process.env.SLACK_TEAM_CACHE_TTL_MS || "60000"),
+  1000,
+);
+
 /**
  * Encrypt a Slack bot token before storage
  * 
  * @param botToken - The plain-text bot token (xoxb-...)
  * @returns Encrypted token string
  */
-export function encryptSlackToken(botToken: string): string {
+export async function encryptSlackToken(botToken: string): Promise<string> {
   if (!botToken) {
     throw new Error("Bot token is required");
   }
@@ -37,7 +47,7 @@ export function encryptSlackToken(botToken: string): string {
  * @param encryptedToken - The encrypted token from database
  * @returns Plain-text bot token
  */
-export function decryptSlackToken(encryptedToken: string): string {
+export async function decryptSlackToken(encryptedToken: string): Promise<string> {
   if (!encryptedToken) {
     throw new Error("Encrypted token is required");
   }
@@ -61,7 +71,7 @@ export async function getSlackBotToken(userId: string): Promise<string | null> {
   }
   
   try {
-    return decryptSlackToken(connection.botToken);
+    return await decryptSlackToken(connection.botToken);
   } catch (error) {
     console.error("Failed to decrypt Slack bot token:", error);
     // Token might be stored unencrypted (legacy), try returning as-is
@@ -87,7 +97,7 @@ export async function getSlackBotTokenByTeam(teamId: string): Promise<string | n
   }
   
   try {
-    return decryptSlackToken(connection.botToken);
+    return await decryptSlackToken(connection.botToken);
   } catch (error) {
     console.error("Failed to decrypt Slack bot token:", error);
     console.warn("Slack token may be stored unencrypted. Migration needed.");
@@ -113,32 +123,10 @@ export async function createSlackConnection(
     scopes: string[];
   }
 ) {
-  const encryptedToken = encryptSlackToken(botToken);
-  
-  // Check if connection already exists for this team
-  const existing = await db.query.slackConnections.findFirst({
-    where: eq(slackConnections.teamId, metadata.teamId),
-  });
+  const encryptedToken = await encryptSlackToken(botToken);
   
-  if (existing) {
-    // Update existing connection
-    const [updated] = await db
-      .update(slackConnections)
-      .set({
-        botToken: encryptedToken,
-        botUserId: metadata.botUserId,
-        teamName: metadata.teamName,
-        scopes: metadata.scopes,
-        isActive: true,
-        updatedAt: new Date(),
-      })
-      .where(eq(slackConnections.id, existing.id))
-      .returning();
-    
-    return updated;
-  }
-  
-  // Create new connection
+  // Insert, or update the existing connection for this workspace, in one
+  // round trip (team_id is unique)
   const [connection] = await db
     .insert(slackConnections)
     .values({
@@ -150,7 +138,20 @@ export async function createSlackConnection(
       scopes: metadata.scopes,
       isActive: true,
     })
+    .onConflictDoUpdate({
+      target: slackConnections.teamId,
+      set: {
+        botToken: encryptedToken,
+        botUserId: metadata.botUserId,
+        teamName: metadata.teamName,
+        scopes: metadata.scopes,
+        isActive: true,
+        updatedAt: new Date(),
+      },
+    })
     .returning();
   
+  teamUserCache.delete(metadata.teamId);
+  
   return connection;
 }
@@ -0,0 +1,74 @@
+/**
+ * Stream batching utility for Server-Sent Events
+ *
+ * Sending every token as its own SSE frame makes framing overhead dominate
+ * at high concurrency. This coalesces chunks produced within a short window
+ * so multiple deltas share one frame.
+ */
+
+/**
+ * Group chunks from an async source into batches
+ * A batch is flushed when it reaches `maxChunks` or when `maxDelayMs` has
+ * passed since its first chunk arrived, whichever comes first
+ */
+export async function* batchChunks<T>(
+  source: AsyncIterable<T>,
+  maxChunks: number,
+  maxDelayMs: number,
+): AsyncGenerator<T[]> {
+  const iterator = source[Symbol.asyncIterator]();
+  let pending: Promise<IteratorResult<T>> | null = null;
+  let batch: T[] = [];
+  let deadline = 0;
+
+  try {
+    while (true) {
+      // Keep the in-flight next() across timer flushes so no chunk is dropped
+      pending ??= iterator.next();
+
+      let result: IteratorResult<T> | null;
+      if (batch.length === 0) {
+        result = await pending;
+      } else {
+        let timeoutId: ReturnType<typeof setTimeout> | undefined;
+        const timer = new Promise<null>((resolve) => {
+          timeoutId = setTimeout(() => resolve(null), Math.max(0, deadline - Date.now()));
+        });
+        result = await Promise.race([pending, timer]);
+        clearTimeout(timeoutId);
+      }
+
+      // Window elapsed before the next chunk arrived
+      if (result === null) {
+        yield batch;
+        batch = [];
+        continue;
+      }
+
+      pending = null;
+
+      if (result.done) {
+        break;
+      }
+
+      if (batch.length === 0) {
+        deadline = Date.now() + maxDelayMs;
+      }
+
+      batch.push(result.value);
+
+      if (batch.length >= maxChunks) {
+        yield batch;
+        batch = [];
+      }
+    }
+
+    if (batch.length > 0) {
+      yield batch;
+    }
+  } finally {
+    // Consumer stopped early (break/throw): finalize the source so the
+    // upstream stream stops producing and releases its connection
+    await iterator.return?.();
+  }
+}
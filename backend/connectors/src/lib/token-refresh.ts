@@ -4,12 +4,37 @@
  * Automatically refreshes expired access tokens
  */
 
-import { db, schema } from "@backend/db";
+import { db, schema, type LinearConnection } from "@backend/db";
 import { eq } from "drizzle-orm";
 import { decrypt, encrypt } from "./encryption";
 
 const { linearConnections } = schema;
 
+const LINEAR_CLIENT_ID = process.env.LINEAR_CLIENT_ID || "";
+const LINEAR_CLIENT_SECRET = process.env.LINEAR_CLIENT_SECRET || "";
+
+// Maximum number of token refreshes in flight during a bulk refresh; a
+// zero or malformed value would start no workers, so it is clamped to >= 1
+const configuredConcurrency = parseInt(process.env.TOKEN_REFRESH_CONCURRENCY || "8");
+const REFRESH_CONCURRENCY = Math.max(1, Number.isFinite(configuredConcurrency) ? configuredConcurrency : 8);
+
+// Tokens are treated as expired this long before they actually expire
+const EXPIRY_BUFFER_MS = 5 * 60 * 1000; // 5 minute buffer
+
+/**
+ * Refreshed token result
+ */
+interface RefreshedToken {
+  accessToken: string;
+  refreshToken?: string;
+  expiresAt: Date | null;
+}
+
+// Refreshes in flight, keyed by connection id. Concurrent callers for the
+// same connection share one refresh instead of each spending the (rotating)
+// refresh token and racing on the row update
+const inFlightRefreshes: Map<string, Promise<RefreshedToken>> = new Map();
+
 /**
  * Linear token response
  */
@@ -29,8 +54,7 @@ export function isTokenExpired(expiresAt: Date | null): boolean {
     return true;
   }
   
-  const bufferMs = 5 * 60 * 1000; // 5 minute buffer
-  return new Date().getTime() + bufferMs >= expiresAt.getTime();
+  return Date.now() + EXPIRY_BUFFER_MS >= expiresAt.getTime();
 }
 
 /**
@@ -38,7 +62,7 @@ export function isTokenExpired(expiresAt: Date | null): boolean {
  */
 export async function refreshLinearToken(
   connectionId: string
-): Promise<{ accessToken: string; refreshToken?: string; expiresAt: Date | null }> {
+): Promise<RefreshedToken> {
   const connection = await db.query.linearConnections.findFirst({
     where: eq(linearConnections.id, connectionId),
   });
@@ -47,12 +71,40 @@ export async function refreshLinearToken(
     throw new Error("Connection not found");
   }
   
+  return refreshConnectionToken(connection);
+}
+
+/**
+ * Refresh the token for an already-loaded connection row
+ */
+function refreshConnectionToken(
+  connection: LinearConnection
+): Promise<RefreshedToken> {
+  const pending = inFlightRefreshes.get(connection.id);
+  if (pending) {
+    return pending;
+  }
+  
+  const refresh = requestTokenRefresh(connection).finally(() => {
+    inFlightRefreshes.delete(connection.id);
+  });
+  inFlightRefreshes.set(connection.id, refresh);
+  
+  return refresh;
+}
+
+/**
+ * Exchange the connection's refresh token and store the new tokens
+ */
+async function requestTokenRefresh(
+  connection: LinearConnection
+): Promise<RefreshedToken> {
   if (!connection.refreshToken) {
     throw new Error("No refresh token available");
   }
   
   // Decrypt refresh token
-  const refreshToken = decrypt(connection.refreshToken);
+  const refreshToken = await decrypt(connection.refreshToken);
   
   // Call Linear token endpoint
   const response = await fetch("https://api.linear.app/oauth/token", {
@@ -62,8 +114,8 @@ export async function refreshLinearToken(
     },
     body: JSON.stringify({
       grant_type: "refresh_token",
-      client_id: process.env.LINEAR_CLIENT_ID,
-      client_secret: process.env.LINEAR_CLIENT_SECRET,
+      client_id: LINEAR_CLIENT_ID,
+      client_secret: LINEAR_CLIENT_SECRET,
       refresh_token: refreshToken,
     }),
   });
@@ -81,10 +133,10 @@ export async function refreshLinearToken(
     : null;
   
   // Encrypt new tokens
-  const encryptedAccessToken = encrypt(data.access_token);
-  const encryptedRefreshToken = data.refresh_token
-    ? encrypt(data.refresh_token)
-    : undefined;
+  const [encryptedAccessToken, encryptedRefreshToken] = await Promise.all([
+    encrypt(data.access_token),
+    data.refresh_token ? encrypt(data.refresh_token) : undefined,
+  ]);
   
   // Update database
   await db
@@ -95,7 +147,7 @@ export async function refreshLinearToken(
       tokenExpiresAt: expiresAt,
       updatedAt: new Date(),
     })
-    .where(eq(linearConnections.id, connectionId));
+    .where(eq(linearConnections.id, connection.id));
   
   return {
     accessToken: data.access_token,
@@ -117,19 +169,29 @@ export async function getValidLinearToken(connectionId: string): Promise<string>
     throw new Error("Linear connection not found");
   }
   
+  return getValidTokenForConnection(connection);
+}
+
+/**
+ * Get a valid access token for an already-loaded connection row
+ * Use this when the caller has the row, to avoid loading it again
+ */
+export async function getValidTokenForConnection(
+  connection: LinearConnection
+): Promise<string> {
   if (!connection.isActive) {
     throw new Error("Linear connection is inactive");
   }
   
   // Check if token needs refresh
   if (isTokenExpired(connection.tokenExpiresAt)) {
-    console.log(`🔄 Refreshing expired Linear token for connection ${connectionId}`);
-    const refreshed = await refreshLinearToken(connectionId);
+    console.log(`🔄 Refreshing expired Linear token for connection ${connection.id}`);
+    const refreshed = await refreshConnectionToken(connection);
     return refreshed.accessToken;
   }
   
   // Decrypt and return existing token
-  return decrypt(connection.accessToken);
+  return await decrypt(connection.accessToken);
 }
 
 /**
@@ -149,12 +211,8 @@ export async function getValidLinearTokenByUser(userId: string): Promise<{
     throw new Error("No Linear connection found for user");
   }
   
-  if (!connection.isActive) {
-    throw new Error("Linear connection is inactive");
-  }
-  
   // Get valid token (refresh if needed)
-  const token = await getValidLinearToken(connection.id);
+  const token = await getValidTokenForConnection(connection);
   
   return {
     token,
@@ -174,20 +232,34 @@ export async function refreshAllExpiredTokens(): Promise<{
     where: eq(linearConnections.isActive, true),
   });
   
+  const expired = connections.filter((connection) =>
+    isTokenExpired(connection.tokenExpiresAt)
+  );
+  
   let refreshed = 0;
   let failed = 0;
+  let next = 0;
   
-  for (const connection of connections) {
-    if (isTokenExpired(connection.tokenExpiresAt)) {
+  // Each worker pulls the next expired connection until none are left,
+  // so at most REFRESH_CONCURRENCY refreshes are in flight at once
+  const worker = async () => {
+    while (next < expired.length) {
+      const connection = expired[next++];
+      if (!connection) break;
+      
       try {
-        await refreshLinearToken(connection.id);
+        await refreshConnectionToken(connection);
         refreshed++;
       } catch (error) {
         console.error(`Failed to refresh token for ${connection.id}:`, error);
         failed++;
       }
     }
-  }
+  };
+  
+  await Promise.all(
+    Array.from({ length: Math.min(REFRESH_CONCURRENCY, expired.length) }, worker)
+  );
   
   return { refreshed, failed };
 }
@@ -0,0 +1,61 @@
+/**
+ * Bounded in-memory cache with per-entry expiry
+ *
+ * For lookups that are repeated on every webhook and change rarely
+ * (e.g. which user a Slack workspace belongs to)
+ */
+
+interface Entry<V> {
+  value: V;
+  expiresAt: number;
+}
+
+export class TtlCache<K, V> {
+  private entries: Map<K, Entry<V>> = new Map();
+  private ttlMs: number;
+  private maxSize: number;
+
+  constructor(ttlMs: number, maxSize: number) {
+    this.ttlMs = ttlMs;
+    this.maxSize = maxSize;
+  }
+
+  /**
+   * Get a cached value, or undefined if missing or expired
+   */
+  get(key: K): V | undefined {
+    const entry = this.entries.get(key);
+    if (!entry) {
+      return undefined;
+    }
+
+    if (entry.expiresAt <= Date.now()) {
+      this.entries.delete(key);
+      return undefined;
+    }
+
+    return entry.value;
+  }
+
+  has(key: K): boolean {
+    return this.get(key) !== undefined;
+  }
+
+  /**
+   * Cache a value, evicting the oldest entry when full
+   */
+  set(key: K, value: V): void {
+    this.entries.delete(key);
+
+    if (this.entries.size >= this.maxSize) {
+      const oldest = this.entries.keys().next().value;
+      if (oldest !== undefined) this.entries.delete(oldest);
+    }
+
+    this.entries.set(key, { value, expiresAt: Date.now() + this.ttlMs });
+  }
+
+  delete(key: K): void {
+    this.entries.delete(key);
+  }
+}
@@ -2,9 +2,11 @@ import { Elysia } from "elysia";
 import { cors } from "@elysiajs/cors";
 import { oauthRoutes } from "@/routes/oauth";
 import { agentRoutes } from "@/routes/agent";
-import { slackEventsRoutes } from "@/routes/slack-events";
+import { slackEventsRoutes, drainSlackEvents } from "@/routes/slack-events";
 import { linearEventsRoutes } from "@/routes/linear-events";
 import { standardRateLimit } from "@/middleware/rate-limit";
+import { compression } from "@/middleware/compression";
+import { mcpClientManager } from "@/mcp/client";
 
 const app = new Elysia()
   .use(
@@ -13,6 +15,7 @@ const app = new Elysia()
       credentials: true,
     }),
   )
+  .use(compression)
   .get("/health", () => ({
     status: "ok",
     timestamp: new Date().toISOString(),
@@ -37,3 +40,22 @@ console.log(
 );
 console.log(`📡 Webhooks: No rate limit (signature verified)`);
 console.log(`🔒 API routes: JWT required, rate limited (100 req/min)`);
+
+// Slack events are acknowledged before they're written, and MCP connections
+// stay open across runs, so store the one and close the other on shutdown
+async function shutdown(signal: string): Promise<void> {
+  console.log(`🛑 ${signal} received, shutting down`);
+  await app.stop();
+
+  try {
+    await drainSlackEvents();
+    await mcpClientManager.disconnectAll();
+  } catch (error) {
+    console.error("❌ Error during shutdown:", error);
+  }
+
+  process.exit(0);
+}
+
+process.on("SIGTERM", () => void shutdown("SIGTERM"));
+process.on("SIGINT", () => void shutdown("SIGINT"));
@@ -18,14 +18,36 @@ export class McpClientManager {
   private clients: Map<string, Client> = new Map();
   private transports: Map<string, SSEClientTransport> = new Map();
   private tools: Map<string, ToolWithServer> = new Map();
-  private authContexts: Map<string, { token: string; scopes: string[] }> = new Map();
-
+  private connecting: Map<string, Promise<void>> = new Map();
+  // Cached getAllTools() result, rebuilt only when the tool set changes
+  private toolList: readonly ToolWithServer[] | null = null;
+  // Tools grouped by server, so per-server lookups don't scan every tool
+  private serverTools: Map<string, readonly ToolWithServer[]> = new Map();
+
+  /**
+   * Connect to an MCP server, reusing the existing connection if there is one
+   * Connections stay open across agent runs; concurrent callers share a
+   * single in-flight connect
+   */
   async connectServer(config: McpServerConfig): Promise<void> {
     if (this.clients.has(config.id)) {
-      console.log(`Already connected to ${config.name}`);
       return;
     }
 
+    const pending = this.connecting.get(config.id);
+    if (pending) {
+      return pending;
+    }
+
+    const connection = this.openConnection(config).finally(() => {
+      this.connecting.delete(config.id);
+    });
+    this.connecting.set(config.id, connection);
+
+    return connection;
+  }
+
+  private async openConnection(config: McpServerConfig): Promise<void> {
     try {
       const transport = new SSEClientTransport(new URL(config.url));
 
@@ -39,13 +61,29 @@ export class McpClientManager {
         },
       );
 
+      // Drop a connection the server closed so the next run reconnects
+      client.onclose = () => {
+        if (this.clients.get(config.id) === client) {
+          this.forgetServer(config.id);
+          console.log(`🔌 Connection to ${config.name} closed`);
+        }
+      };
+
       await client.connect(transport);
 
+      // Discover before registering: a connection without its tools would
+      // be reused by every later run, so a failure here must not stick
+      try {
+        await this.discoverTools(config, client);
+      } catch (error) {
+        this.forgetServer(config.id);
+        await client.close().catch(() => {});
+        throw error;
+      }
+
       this.clients.set(config.id, client);
       this.transports.set(config.id, transport);
 
-      await this.discoverTools(config);
-
       console.log(`✅ Connected to ${config.name} MCP server`);
     } catch (error) {
       console.error(`❌ Failed to connect to ${config.name}:`, error);
@@ -53,46 +91,44 @@ export class McpClientManager {
     }
   }
 
-  private async discoverTools(config: McpServerConfig): Promise<void> {
-    const client = this.clients.get(config.id);
-    if (!client) return;
-
+  private async discoverTools(config: McpServerConfig, client: Client): Promise<void> {
     try {
       const response = await client.listTools();
+      const serverTools: ToolWithServer[] = [];
 
       for (const tool of response.tools) {
-        const toolId = `${config.id}:${tool.name}`;
-        this.tools.set(toolId, {
+        const toolWithServer = {
           ...tool,
           serverId: config.id,
           serverName: config.name,
-        });
+        };
+        this.tools.set(`${config.id}:${tool.name}`, toolWithServer);
+        serverTools.push(toolWithServer);
       }
+      this.serverTools.set(config.id, Object.freeze(serverTools));
+      this.toolList = null;
 
       console.log(
         `📋 Discovered ${response.tools.length} tools from ${config.name}`,
       );
     } catch (error) {
       console.error(`❌ Failed to discover tools from ${config.name}:`, error);
+      throw error;
     }
   }
 
-  getAllTools(): ToolWithServer[] {
-    return Array.from(this.tools.values());
+  getAllTools(): readonly ToolWithServer[] {
+    this.toolList ??= Object.freeze(Array.from(this.tools.values()));
+    return this.toolList;
   }
 
-  getToolsByServer(serverId: string): ToolWithServer[] {
-    return this.getAllTools().filter((tool) => tool.serverId === serverId);
+  getToolsByServer(serverId: string): readonly ToolWithServer[] {
+    return this.serverTools.get(serverId) ?? [];
   }
 
   async callTool(
     toolId: string,
     args: Record<string, unknown>,
-    authContext?: {
-      userId: string;
-      oauthToken: string;
-      scopes: string[];
-    },
   ): Promise<unknown> {
     const tool = this.tools.get(toolId);
     if (!tool) {
@@ -105,13 +141,6 @@ export class McpClientManager {
     }
 
     try {
-      if (authContext) {
-        this.authContexts.set(tool.serverId, {
-          token: authContext.oauthToken,
-          scopes: authContext.scopes,
-        });
-      }
-
       const result = await client.callTool({
         name: tool.name,
         arguments: args,
@@ -124,36 +153,32 @@ export class McpClientManager {
     }
   }
 
-  getAuthContext(serverId: string): { token: string; scopes: string[] } | undefined {
-    return this.authContexts.get(serverId);
-  }
-
   async disconnectServer(serverId: string): Promise<void> {
     const client = this.clients.get(serverId);
-    const transport = this.transports.get(serverId);
+
+    // Forget first so the onclose handler doesn't run cleanup twice
+    this.forgetServer(serverId);
 
     if (client) {
       await client.close();
-      this.clients.delete(serverId);
     }
 
-    if (transport) {
-      this.transports.delete(serverId);
-    }
+    console.log(`🔌 Disconnected from ${serverId}`);
+  }
 
-    this.authContexts.delete(serverId);
+  private forgetServer(serverId: string): void {
+    this.clients.delete(serverId);
+    this.transports.delete(serverId);
 
-    for (const [id, tool] of this.tools) {
-      if (tool.serverId === serverId) {
-        this.tools.delete(id);
-      }
+    for (const tool of this.serverTools.get(serverId) ?? []) {
+      this.tools.delete(`${serverId}:${tool.name}`);
     }
-
-    console.log(`🔌 Disconnected from ${serverId}`);
+    this.serverTools.delete(serverId);
+    this.toolList = null;
   }
 
   async disconnectAll(): Promise<void> {
-    for (const serverId of this.clients.keys()) {
+    for (const serverId of [...this.clients.keys()]) {
       await this.disconnectServer(serverId);
     }
   }
@@ -17,6 +17,7 @@ import { StdioServerTransport } from "@modelcontextprotocol/sdk/server/stdio.js"
 import {
   CallToolRequestSchema,
   ListToolsRequestSchema,
+  type ListToolsResult,
 } from "@modelcontextprotocol/sdk/types.js";
 import { z } from "zod";
 import { sign } from "jsonwebtoken";
@@ -32,6 +33,33 @@ type TokenCache = {
 };
 
 const tokenCache = new Map<number, TokenCache>();
+const TOKEN_CACHE_MAX_SIZE = parseInt(process.env.GITHUB_TOKEN_CACHE_MAX_SIZE || "1000");
+
+/**
+ * Cache an installation token, keeping the cache bounded
+ * Expired tokens are dropped first, then the oldest entries (Map keeps
+ * insertion order, so the first key is the least recently issued)
+ */
+function cacheToken(installationId: number, entry: TokenCache): void {
+  tokenCache.delete(installationId);
+
+  if (tokenCache.size >= TOKEN_CACHE_MAX_SIZE) {
+    const now = Date.now();
+    for (const [id, cached] of tokenCache) {
+      if (cached.expiresAt <= now) {
+        tokenCache.delete(id);
+      }
+    }
+  }
+
+  while (tokenCache.size >= TOKEN_CACHE_MAX_SIZE) {
+    const oldest = tokenCache.keys().next().value;
+    if (oldest === undefined) break;
+    tokenCache.delete(oldest);
+  }
+
+  tokenCache.set(installationId, entry);
+}
 
 const baseArgsSchema = z.object({
   _installationId: z.number(),
@@ -119,11 +147,19 @@ async function getInstallationToken(installationId: number): Promise<string> {
   const expiresAt = new Date(data.expires_at).getTime();
 
   // Cache it
-  tokenCache.set(installationId, { token, expiresAt });
+  cacheToken(installationId, { token, expiresAt });
 
   return token;
 }
 
+/**
+ * Build the API path for a repository
+ * Owner and repo come from tool arguments, so escape them as path segments
+ */
+function repoPath(owner: string, repo: string): string {
+  return `/repos/${encodeURIComponent(owner)}/${encodeURIComponent(repo)}`;
+}
+
 /**
  * Call GitHub API with installation token
  */
@@ -152,83 +188,163 @@ async function callGitHubApi(
   return response.json();
 }
 
-// Create MCP Server
-const server = new Server(
-  { name: "github-mcp-server", version: "1.0.0" },
-  { capabilities: { tools: {} } },
-);
-
-// List available tools
-server.setRequestHandler(ListToolsRequestSchema, async () => {
-  return {
-    tools: [
-      {
-        name: "github_list_repositories",
-        description: "List repositories accessible to the installation",
-        inputSchema: {
-          type: "object",
-          properties: {
-            visibility: {
-              type: "string",
-              enum: ["all", "public", "private"],
-            },
-            sort: {
-              type: "string",
-              enum: ["created", "updated", "pushed", "full_name"],
-            },
-            per_page: { type: "number", default: 30 },
-            _installationId: { type: "number" },
+// Tool definitions are static, so the list response is built once
+const TOOL_LIST: ListToolsResult = {
+  tools: [
+    {
+      name: "github_list_repositories",
+      description: "List repositories accessible to the installation",
+      inputSchema: {
+        type: "object",
+        properties: {
+          visibility: {
+            type: "string",
+            enum: ["all", "public", "private"],
+          },
+          sort: {
+            type: "string",
+            enum: ["created", "updated", "pushed", "full_name"],
           },
-          required: ["_installationId"],
+          per_page: { type: "number", default: 30 },
+          _installationId: { type: "number" },
         },
+        required: ["_installationId"],
       },
-      {
-        name: "github_get_repository",
-        description: "Get repository details",
-        inputSchema: {
-          type: "object",
-          properties: {
-            owner: { type: "string" },
-            repo: { type: "string" },
-            _installationId: { type: "number" },
-          },
-          required: ["owner", "repo", "_installationId"],
+    },
+    {
+      name: "github_get_repository",
+      description: "Get repository details",
+      inputSchema: {
+        type: "object",
+        properties: {
+          owner: { type: "string" },
+          repo: { type: "string" },
+          _installationId: { type: "number" },
         },
+        required: ["owner", "repo", "_installationId"],
       },
-      {
-        name: "github_list_issues",
-        description: "List issues in a repository",
-        inputSchema: {
-          type: "object",
-          properties: {
-            owner: { type: "string" },
-            repo: { type: "string" },
-            state: { type: "string", enum: ["open", "closed", "all"] },
-            per_page: { type: "number", default: 30 },
-            _installationId: { type: "number" },
-          },
-          required: ["owner", "repo", "_installationId"],
+    },
+    {
+      name: "github_list_issues",
+      description: "List issues in a repository",
+      inputSchema: {
+        type: "object",
+        properties: {
+          owner: { type: "string" },
+          repo: { type: "string" },
+          state: { type: "string", enum: ["open", "closed", "all"] },
+          per_page: { type: "number", default: 30 },
+          _installationId: { type: "number" },
         },
+        required: ["owner", "repo", "_installationId"],
       },
-      {
-        name: "github_create_issue",
-        description: "Create a new issue (WRITE OPERATION)",
-        inputSchema: {
-          type: "object",
-          properties: {
-            owner: { type: "string" },
-            repo: { type: "string" },
-            title: { type: "string" },
-            body: { type: "string" },
-            labels: { type: "array", items: { type: "string" } },
-            _installationId: { type: "number" },
-          },
-          required: ["owner", "repo", "title", "_installationId"],
+    },
+    {
+      name: "github_create_issue",
+      description: "Create a new issue (WRITE OPERATION)",
+      inputSchema: {
+        type: "object",
+        properties: {
+          owner: { type: "string" },
+          repo: { type: "string" },
+          title: { type: "string" },
+          body: { type: "string" },
+          labels: { type: "array", items: { type: "string" } },
+          _installationId: { type: "number" },
         },
+        required: ["owner", "repo", "title", "_installationId"],
       },
-    ],
-  };
-});
+    },
+  ],
+};
+
+// Create MCP Server
+const server = new Server(
+  { name: "github-mcp-server", version: "1.0.0" },
+  { capabilities: { tools: {} } },
+);
+
+// List available tools
+server.setRequestHandler(ListToolsRequestSchema, async () => TOOL_LIST);
+
+/**
+ * Tool handlers by name
+ * Each handler validates its own arguments once and uses the parsed values,
+ * including the installation ID
+ */
+const TOOL_HANDLERS = new Map<string, (args: unknown) => Promise<unknown>>([
+  [
+    "github_list_repositories",
+    async (args) => {
+      const { visibility, sort, per_page, _installationId } =
+        listReposSchema.parse(args);
+      const params = new URLSearchParams();
+      if (visibility) params.append("visibility", visibility);
+      if (sort) params.append("sort", sort);
+      if (per_page) params.append("per_page", per_page.toString());
+
+      const repos = await callGitHubApi(
+        `/user/repos?${params.toString()}`,
+        _installationId,
+      );
+
+      return repos.map((repo: any) => ({
+        id: repo.id,
+        name: repo.name,
+        fullName: repo.full_name,
+        private: repo.private,
+        description: repo.description,
+        url: repo.html_url,
+        stars: repo.stargazers_count,
+        language: repo.language,
+      }));
+    },
+  ],
+  [
+    "github_get_repository",
+    async (args) => {
+      const { owner, repo, _installationId } = getRepoSchema.parse(args);
+      return callGitHubApi(repoPath(owner, repo), _installationId);
+    },
+  ],
+  [
+    "github_list_issues",
+    async (args) => {
+      const { owner, repo, state, per_page, _installationId } =
+        listIssuesSchema.parse(args);
+      const params = new URLSearchParams();
+      if (state) params.append("state", state);
+      if (per_page) params.append("per_page", per_page.toString());
+
+      const issues = await callGitHubApi(
+        `${repoPath(owner, repo)}/issues?${params.toString()}`,
+        _installationId,
+      );
+
+      return issues.map((issue: any) => ({
+        id: issue.id,
+        number: issue.number,
+        title: issue.title,
+        state: issue.state,
+        url: issue.html_url,
+        createdAt: issue.created_at,
+        author: issue.user?.login,
+      }));
+    },
+  ],
+  [
+    "github_create_issue",
+    async (args) => {
+      const { owner, repo, title, body, labels, _installationId } =
+        createIssueSchema.parse(args);
+      return callGitHubApi(`${repoPath(owner, repo)}/issues`, _installationId, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ title, body, labels }),
+      });
+    },
+  ],
+]);
 
 // Handle tool calls
 server.setRequestHandler(CallToolRequestSchema, async (request) => {
@@ -238,90 +354,15 @@ server.setRequestHandler(CallToolRequestSchema, async (request) => {
     throw new Error("Invalid arguments");
   }
 
-  const parsedArgs = args as Record<string, unknown>;
+  const handler = TOOL_HANDLERS.get(name);
 
   try {
-    let result: any;
-
-    switch (name) {
-      case "github_list_repositories": {
-        const { visibility, sort, per_page } =
-          listReposSchema.parse(parsedArgs);
-        const params = new URLSearchParams();
-        if (visibility) params.append("visibility", visibility);
-        if (sort) params.append("sort", sort);
-        if (per_page) params.append("per_page", per_page.toString());
-
-        result = await callGitHubApi(
-          `/user/repos?${params.toString()}`,
-          parsedArgs._installationId as number,
-        );
-
-        result = result.map((repo: any) => ({
-          id: repo.id,
-          name: repo.name,
-          fullName: repo.full_name,
-          private: repo.private,
-          description: repo.description,
-          url: repo.html_url,
-          stars: repo.stargazers_count,
-          language: repo.language,
-        }));
-        break;
-      }
-
-      case "github_get_repository": {
-        const { owner, repo } = getRepoSchema.parse(parsedArgs);
-        result = await callGitHubApi(
-          `/repos/${owner}/${repo}`,
-          parsedArgs._installationId as number,
-        );
-        break;
-      }
-
-      case "github_list_issues": {
-        const { owner, repo, state, per_page } =
-          listIssuesSchema.parse(parsedArgs);
-        const params = new URLSearchParams();
-        if (state) params.append("state", state);
-        if (per_page) params.append("per_page", per_page.toString());
-
-        result = await callGitHubApi(
-          `/repos/${owner}/${repo}/issues?${params.toString()}`,
-          parsedArgs._installationId as number,
-        );
-
-        result = result.map((issue: any) => ({
-          id: issue.id,
-          number: issue.number,
-          title: issue.title,
-          state: issue.state,
-          url: issue.html_url,
-          createdAt: issue.created_at,
-          author: issue.user?.login,
-        }));
-        break;
-      }
-
-      case "github_create_issue": {
-        const { owner, repo, title, body, labels } =
-          createIssueSchema.parse(parsedArgs);
-        result = await callGitHubApi(
-          `/repos/${owner}/${repo}/issues`,
-          parsedArgs._installationId as number,
-          {
-            method: "POST",
-            headers: { "Content-Type": "application/json" },
-            body: JSON.stringify({ title, body, labels }),
-          },
-        );
-        break;
-      }
-
-      default:
-        throw new Error(`Unknown tool: ${name}`);
+    if (!handler) {
+      throw new Error(`Unknown tool: ${name}`);
     }
 
+    const result = await handler(args);
+
     return {
       content: [
         {
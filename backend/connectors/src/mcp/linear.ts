@@ -16,6 +16,7 @@ import { StdioServerTransport } from "@modelcontextprotocol/sdk/server/stdio.js"
 import {
   CallToolRequestSchema,
   ListToolsRequestSchema,
+  type ListToolsResult,
 } from "@modelcontextprotocol/sdk/types.js";
 import { z } from "zod";
 
@@ -153,221 +154,222 @@ async function callLinearApi(
   return data.data;
 }
 
-// Create MCP Server
-const server = new Server(
-  { name: "linear-mcp-server", version: "1.0.0" },
-  { capabilities: { tools: {} } },
-);
-
-// List available tools
-server.setRequestHandler(ListToolsRequestSchema, async () => {
-  return {
-    tools: [
-      {
-        name: "linear_list_issues",
-        description: "List issues from Linear. Can filter by state, assignee, or project.",
-        inputSchema: {
-          type: "object",
-          properties: {
-            state: {
-              type: "string",
-              enum: ["open", "closed", "all"],
-              description: "Filter by issue state",
-            },
-            limit: {
-              type: "number",
-              default: 50,
-              description: "Maximum number of issues to return (1-100)",
-            },
-            assigneeId: {
-              type: "string",
-              description: "Filter by assignee user ID",
-            },
-            projectId: {
-              type: "string",
-              description: "Filter by project ID",
-            },
-            _oauthToken: {
-              type: "string",
-              description: "OAuth access token (provided by backend)",
-            },
-          },
-          required: ["_oauthToken"],
+// Tool definitions are static, so the list response is built once
+const TOOL_LIST: ListToolsResult = {
+  tools: [
+    {
+      name: "linear_list_issues",
+      description: "List issues from Linear. Can filter by state, assignee, or project.",
+      inputSchema: {
+        type: "object",
+        properties: {
+          state: {
+            type: "string",
+            enum: ["open", "closed", "all"],
+            description: "Filter by issue state",
+          },
+          limit: {
+            type: "number",
+            default: 50,
+            description: "Maximum number of issues to return (1-100)",
+          },
+          assigneeId: {
+            type: "string",
+            description: "Filter by assignee user ID",
+          },
+          projectId: {
+            type: "string",
+            description: "Filter by project ID",
+          },
+          _oauthToken: {
+            type: "string",
+            description: "OAuth access token (provided by backend)",
+          },
         },
+        required: ["_oauthToken"],
       },
-      {
-        name: "linear_get_issue",
-        description: "Get detailed information about a specific Linear issue by ID",
-        inputSchema: {
-          type: "object",
-          properties: {
-            issueId: {
-              type: "string",
-              description: "The unique identifier of the issue",
-            },
-            _oauthToken: {
-              type: "string",
-              description: "OAuth access token (provided by backend)",
-            },
-          },
-          required: ["issueId", "_oauthToken"],
+    },
+    {
+      name: "linear_get_issue",
+      description: "Get detailed information about a specific Linear issue by ID",
+      inputSchema: {
+        type: "object",
+        properties: {
+          issueId: {
+            type: "string",
+            description: "The unique identifier of the issue",
+          },
+          _oauthToken: {
+            type: "string",
+            description: "OAuth access token (provided by backend)",
+          },
         },
+        required: ["issueId", "_oauthToken"],
       },
-      {
-        name: "linear_create_issue",
-        description: "Create a new issue in Linear (WRITE OPERATION)",
-        inputSchema: {
-          type: "object",
-          properties: {
-            title: {
-              type: "string",
-              description: "Issue title",
-            },
-            description: {
-              type: "string",
-              description: "Issue description (markdown supported)",
-            },
-            teamId: {
-              type: "string",
-              description: "ID of the team to create the issue in",
-            },
-            assigneeId: {
-              type: "string",
-              description: "ID of the user to assign the issue to",
-            },
-            projectId: {
-              type: "string",
-              description: "ID of the project to associate with",
-            },
-            priority: {
-              type: "number",
-              minimum: 0,
-              maximum: 4,
-              description: "Priority level (0=no priority, 1=urgent, 4=low)",
-            },
-            labels: {
-              type: "array",
-              items: { type: "string" },
-              description: "Label IDs to apply to the issue",
-            },
-            _oauthToken: {
-              type: "string",
-              description: "OAuth access token (provided by backend)",
-            },
-          },
-          required: ["title", "teamId", "_oauthToken"],
+    },
+    {
+      name: "linear_create_issue",
+      description: "Create a new issue in Linear (WRITE OPERATION)",
+      inputSchema: {
+        type: "object",
+        properties: {
+          title: {
+            type: "string",
+            description: "Issue title",
+          },
+          description: {
+            type: "string",
+            description: "Issue description (markdown supported)",
+          },
+          teamId: {
+            type: "string",
+            description: "ID of the team to create the issue in",
+          },
+          assigneeId: {
+            type: "string",
+            description: "ID of the user to assign the issue to",
+          },
+          projectId: {
+            type: "string",
+            description: "ID of the project to associate with",
+          },
+          priority: {
+            type: "number",
+            minimum: 0,
+            maximum: 4,
+            description: "Priority level (0=no priority, 1=urgent, 4=low)",
+          },
+          labels: {
+            type: "array",
+            items: { type: "string" },
+            description: "Label IDs to apply to the issue",
+          },
+          _oauthToken: {
+            type: "string",
+            description: "OAuth access token (provided by backend)",
+          },
         },
+        required: ["title", "teamId", "_oauthToken"],
       },
-      {
-        name: "linear_update_issue",
-        description: "Update an existing Linear issue (WRITE OPERATION)",
-        inputSchema: {
-          type: "object",
-          properties: {
-            issueId: {
-              type: "string",
-              description: "ID of the issue to update",
-            },
-            title: {
-              type: "string",
-              description: "New title for the issue",
-            },
-            description: {
-              type: "string",
-              description: "New description for the issue",
-            },
-            state: {
-              type: "string",
-              enum: ["open", "closed"],
-              description: "Change the issue state",
-            },
-            priority: {
-              type: "number",
-              minimum: 0,
-              maximum: 4,
-              description: "Update priority level",
-            },
-            assigneeId: {
-              type: "string",
-              description: "Change the assignee",
-            },
-            _oauthToken: {
-              type: "string",
-              description: "OAuth access token (provided by backend)",
-            },
-          },
-          required: ["issueId", "_oauthToken"],
+    },
+    {
+      name: "linear_update_issue",
+      description: "Update an existing Linear issue (WRITE OPERATION)",
+      inputSchema: {
+        type: "object",
+        properties: {
+          issueId: {
+            type: "string",
+            description: "ID of the issue to update",
+          },
+          title: {
+            type: "string",
+            description: "New title for the issue",
+          },
+          description: {
+            type: "string",
+            description: "New description for the issue",
+          },
+          state: {
+            type: "string",
+            enum: ["open", "closed"],
+            description: "Change the issue state",
+          },
+          priority: {
+            type: "number",
+            minimum: 0,
+            maximum: 4,
+            description: "Update priority level",
+          },
+          assigneeId: {
+            type: "string",
+            description: "Change the assignee",
+          },
+          _oauthToken: {
+            type: "string",
+            description: "OAuth access token (provided by backend)",
+          },
         },
+        required: ["issueId", "_oauthToken"],
       },
-      {
-        name: "linear_list_teams",
-        description: "List all teams in the Linear workspace",
-        inputSchema: {
-          type: "object",
-          properties: {
-            limit: {
-              type: "number",
-              default: 50,
-              description: "Maximum number of teams to return",
-            },
-            _oauthToken: {
-              type: "string",
-              description: "OAuth access token (provided by backend)",
-            },
-          },
-          required: ["_oauthToken"],
+    },
+    {
+      name: "linear_list_teams",
+      description: "List all teams in the Linear workspace",
+      inputSchema: {
+        type: "object",
+        properties: {
+          limit: {
+            type: "number",
+            default: 50,
+            description: "Maximum number of teams to return",
+          },
+          _oauthToken: {
+            type: "string",
+            description: "OAuth access token (provided by backend)",
+          },
         },
+        required: ["_oauthToken"],
       },
-      {
-        name: "linear_list_projects",
-        description: "List all projects in the Linear workspace",
-        inputSchema: {
-          type: "object",
-          properties: {
-            limit: {
-              type: "number",
-              default: 50,
-              description: "Maximum number of projects to return",
-            },
-            state: {
-              type: "string",
-              enum: ["planned", "started", "paused", "completed", "canceled"],
-              description: "Filter by project state",
-            },
-            _oauthToken: {
-              type: "string",
-              description: "OAuth access token (provided by backend)",
-            },
-          },
-          required: ["_oauthToken"],
+    },
+    {
+      name: "linear_list_projects",
+      description: "List all projects in the Linear workspace",
+      inputSchema: {
+        type: "object",
+        properties: {
+          limit: {
+            type: "number",
+            default: 50,
+            description: "Maximum number of projects to return",
+          },
+          state: {
+            type: "string",
+            enum: ["planned", "started", "paused", "completed", "canceled"],
+            description: "Filter by project state",
+          },
+          _oauthToken: {
+            type: "string",
+            description: "OAuth access token (provided by backend)",
+          },
         },
+        required: ["_oauthToken"],
       },
-      {
-        name: "linear_search_issues",
-        description: "Search for issues by title, description, or identifier",
-        inputSchema: {
-          type: "object",
-          properties: {
-            query: {
-              type: "string",
-              description: "Search query string",
-            },
-            limit: {
-              type: "number",
-              default: 20,
-              description: "Maximum number of results",
-            },
-            _oauthToken: {
-              type: "string",
-              description: "OAuth access token (provided by backend)",
-            },
-          },
-          required: ["query", "_oauthToken"],
+    },
+    {
+      name: "linear_search_issues",
+      description: "Search for issues by title, description, or identifier",
+      inputSchema: {
+        type: "object",
+        properties: {
+          query: {
+            type: "string",
+            description: "Search query string",
+          },
+          limit: {
+            type: "number",
+            default: 20,
+            description: "Maximum number of results",
+          },
+          _oauthToken: {
+            type: "string",
+            description: "OAuth access token (provided by backend)",
+          },
         },
+        required: ["query", "_oauthToken"],
       },
-    ],
-  };
-});
+    },
+  ],
+};
+
+// Create MCP Server
+const server = new Server(
+  { name: "linear-mcp-server", version: "1.0.0" },
+  { capabilities: { tools: {} } },
+);
+
+// List available tools
+server.setRequestHandler(ListToolsRequestSchema, async () => TOOL_LIST);
 
 // Handle tool calls
 server.setRequestHandler(CallToolRequestSchema, async (request) => {
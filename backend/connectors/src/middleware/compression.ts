@@ -0,0 +1,57 @@
+/**
+ * Response compression middleware for connectors service
+ *
+ * Gzips JSON and text responses for clients that accept it.
+ * Small bodies are sent as-is since gzip framing would outweigh
+ * the savings, and Response objects (e.g. SSE streams) pass through.
+ */
+
+import { Elysia, StatusMap } from "elysia";
+
+const configuredMinSize = parseInt(process.env.COMPRESSION_MIN_SIZE || "1000");
+const MIN_COMPRESS_SIZE = Number.isFinite(configuredMinSize) ? Math.max(configuredMinSize, 0) : 1000;
+
+const encoder = new TextEncoder();
+
+export const compression = new Elysia({ name: "compression" }).mapResponse(
+  { as: "global" },
+  ({ request, responseValue, set }) => {
+    if (!request.headers.get("accept-encoding")?.includes("gzip")) {
+      return;
+    }
+
+    const isJson =
+      responseValue !== null &&
+      typeof responseValue === "object" &&
+      (Array.isArray(responseValue) || responseValue.constructor === Object);
+
+    if (!isJson && typeof responseValue !== "string") {
+      return;
+    }
+
+    const text = isJson ? JSON.stringify(responseValue) : responseValue;
+
+    // The replacement Response carries its own status, so resolve the one the
+    // handler set (Elysia accepts names like "Not Found" as well as codes)
+    const status =
+      typeof set.status === "number" ? set.status : StatusMap[set.status ?? "OK"];
+    const headers = {
+      "Content-Type":
+        set.headers["content-type"] ??
+        `${isJson ? "application/json" : "text/plain"}; charset=utf-8`,
+    };
+
+    const body = encoder.encode(text);
+
+    if (body.byteLength < MIN_COMPRESS_SIZE) {
+      // Already serialized to measure it; send that rather than letting
+      // Elysia stringify the value a second time
+      return isJson ? new Response(text, { status, headers }) : undefined;
+    }
+
+    set.headers["content-encoding"] = "gzip";
+    set.headers["vary"] = "accept-encoding";
+
+    return new Response(Bun.gzipSync(body), { status, headers });
+  },
+);
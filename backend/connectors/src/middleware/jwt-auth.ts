@@ -8,34 +8,21 @@ const AUDIENCE = process.env.AUTH_AUDIENCE || "https://localhost";
 
 // JWKS cache configuration
 const JWKS_CACHE_TTL = 60 * 60 * 1000; // 1 hour cache
-const JWKS_RETRY_DELAY = 1000; // 1 second initial retry delay
-const JWKS_MAX_RETRIES = 3;
 
-// JWKS client with caching and error handling
+// JWKS client, created once and reused for the life of the process.
+// jose caches the fetched keys inside the client and refetches on its own
+// when they age out or an unknown kid shows up, so recreating it would only
+// throw that cache away.
 let jwks: ReturnType<typeof createRemoteJWKSet> | null = null;
-let jwksLastFetch: number = 0;
-let jwksErrorCount: number = 0;
-let jwksLastError: Error | null = null;
 
 /**
- * Get JWKS client with caching and error handling
- * Implements retry logic with exponential backoff
+ * Get the shared JWKS client, creating it on first use
  */
 function getJWKS() {
-  const now = Date.now();
-  
-  // Return cached JWKS if still valid
-  if (jwks && (now - jwksLastFetch) < JWKS_CACHE_TTL) {
+  if (jwks) {
     return jwks;
   }
-  
-  // Reset error count if enough time has passed
-  if (jwksLastError && (now - jwksLastFetch) > JWKS_RETRY_DELAY * Math.pow(2, JWKS_MAX_RETRIES)) {
-    jwksErrorCount = 0;
-    jwksLastError = null;
-  }
-  
-  // Create new JWKS client
+
   try {
     jwks = createRemoteJWKSet(new URL(JWKS_URL), {
       // Cache duration for individual keys
@@ -45,22 +32,11 @@ function getJWKS() {
       // Retry on network errors
       cooldownDuration: 30000,
     });
-    jwksLastFetch = now;
-    jwksErrorCount = 0;
-    jwksLastError = null;
     console.log("🔑 JWKS client initialized successfully");
   } catch (error) {
     console.error("❌ Failed to initialize JWKS client:", error);
-    jwksLastError = error as Error;
-    jwksErrorCount++;
-    
-    // If we have a cached client, keep using it
-    if (jwks) {
-      console.warn("⚠️ Using cached JWKS client due to fetch error");
-      return jwks;
-    }
   }
-  
+
   return jwks;
 }
 
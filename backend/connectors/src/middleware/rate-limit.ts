@@ -76,14 +76,22 @@ export function createRateLimiter(config: RateLimitConfig) {
     try {
       const client = getRedis();
       
-      const count = await client.incr(redisKey);
+      // Issued together so Bun auto-pipelines them into one round trip:
+      // SET NX starts the window with its expiry, then INCR and TTL
+      const [, count, currentTtl] = await Promise.all([
+        client.send("SET", [redisKey, "0", "EX", String(windowSecs), "NX"]),
+        client.incr(redisKey),
+        client.ttl(redisKey),
+      ]);
       
-      if (count === 1) {
+      let ttl = currentTtl;
+      
+      // Key expired between SET and INCR, leaving a counter with no expiry
+      if (ttl === -1) {
         await client.expire(redisKey, windowSecs);
+        ttl = windowSecs;
       }
       
-      const ttl = await client.ttl(redisKey);
-      
       if (count > maxRequests) {
         set.status = 429;
         set.headers = {
@@ -2,19 +2,27 @@ import { Elysia, t } from "elysia";
 import { db, schema } from "@backend/db";
 import { eq, and } from "drizzle-orm";
 import { jwtAuthMiddleware } from "@/middleware/jwt-auth";
-import { mcpClientManager } from "@/mcp/client";
+import { mcpClientManager, type ToolWithServer } from "@/mcp/client";
 import { decryptSafe } from "@/lib/encryption";
-import { getValidLinearToken } from "@/lib/token-refresh";
+import { getValidTokenForConnection } from "@/lib/token-refresh";
+import { batchChunks } from "@/lib/stream-batch";
 
 const { agentRuns, tools, userTools, githubInstallations, linearConnections } = schema;
 
+// SSE frame batching: deltas produced within the window share one frame.
+// Malformed values fall back to the defaults; both are clamped to >= 1
+const configuredMaxChunks = parseInt(process.env.AGENT_STREAM_MAX_CHUNKS || "16");
+const configuredMaxDelayMs = parseInt(process.env.AGENT_STREAM_MAX_DELAY_MS || "50");
+const STREAM_MAX_CHUNKS = Math.max(1, Number.isFinite(configuredMaxChunks) ? configuredMaxChunks : 16);
+const STREAM_MAX_DELAY_MS = Math.max(1, Number.isFinite(configuredMaxDelayMs) ? configuredMaxDelayMs : 50);
+
 export const agentRoutes = new Elysia({ prefix: "/agent" })
   .use(jwtAuthMiddleware)
 
   // Run agent - REQUIRES JWT AUTH
   .post(
     "/run",
-    async ({ body, user, isAuthenticated }) => {
+    async ({ body, request, user, isAuthenticated }) => {
       if (!isAuthenticated || !user) {
         return { success: false, error: "Unauthorized" };
       }
@@ -37,29 +45,38 @@ export const agentRoutes = new Elysia({ prefix: "/agent" })
       }
 
       try {
-        const githubInstallation = await db.query.githubInstallations.findFirst(
-          {
-            where: and(
-              eq(githubInstallations.userId, userId),
-              eq(githubInstallations.isActive, true),
-            ),
-          },
-        );
+        // These lookups are independent, so run them concurrently
+        const [githubInstallation, activeLinearConnection, enabledTools] =
+          await Promise.all([
+            db.query.githubInstallations.findFirst({
+              where: and(
+                eq(githubInstallations.userId, userId),
+                eq(githubInstallations.isActive, true),
+              ),
+            }),
+            db.query.linearConnections.findFirst({
+              where: and(
+                eq(linearConnections.userId, userId),
+                eq(linearConnections.isActive, true),
+              ),
+            }),
+            db.query.userTools.findMany({
+              where: and(
+                eq(userTools.userId, userId),
+                eq(userTools.isEnabled, true),
+              ),
+            }),
+          ]);
 
         // Get Linear connection with auto-refresh if needed
         let linearToken: string | undefined;
         let linearScopes: string[] = [];
-        let linearConnection = await db.query.linearConnections.findFirst({
-          where: and(
-            eq(linearConnections.userId, userId),
-            eq(linearConnections.isActive, true),
-          ),
-        });
+        let linearConnection = activeLinearConnection;
 
         if (linearConnection) {
           try {
             // Get valid token (auto-refreshes if expired)
-            linearToken = await getValidLinearToken(linearConnection.id);
+            linearToken = await getValidTokenForConnection(linearConnection);
             linearScopes = linearConnection.scopes;
           } catch (error) {
             console.error("Failed to get valid Linear token:", error);
@@ -68,37 +85,51 @@ export const agentRoutes = new Elysia({ prefix: "/agent" })
           }
         }
 
+        // MCP connections are shared across runs, so only expose tools from
+        // servers this user is connected to
+        const serverIds: string[] = [];
+        const connections: Promise<void>[] = [];
+
         if (githubInstallation) {
-          await mcpClientManager.connectServer({
-            id: "github",
-            name: "github",
-            url: process.env.GITHUB_MCP_URL!,
-          });
+          serverIds.push("github");
+          connections.push(
+            mcpClientManager.connectServer({
+              id: "github",
+              name: "github",
+              url: process.env.GITHUB_MCP_URL!,
+            }),
+          );
         }
 
         if (linearConnection && linearToken) {
-          await mcpClientManager.connectServer({
-            id: "linear",
-            name: "linear",
-            url: process.env.LINEAR_MCP_URL!,
-          });
+          serverIds.push("linear");
+          connections.push(
+            mcpClientManager.connectServer({
+              id: "linear",
+              name: "linear",
+              url: process.env.LINEAR_MCP_URL!,
+            }),
+          );
         }
 
-        const availableTools = mcpClientManager.getAllTools();
-
-        const enabledTools = await db.query.userTools.findMany({
-          where: and(
-            eq(userTools.userId, userId),
-            eq(userTools.isEnabled, true),
-          ),
-        });
+        await Promise.all(connections);
 
+        // Single pass over each server's tools, collecting the enabled ones
+        // and their names together
         const enabledNames = new Set(enabledTools.map((t) => t.toolName));
-        const filteredTools = availableTools.filter((tool) =>
-          enabledNames.has(tool.name),
-        );
+        const filteredTools: ToolWithServer[] = [];
+        const toolsUsed: string[] = [];
 
-        const response = await executeWithMastra({
+        for (const id of serverIds) {
+          for (const tool of mcpClientManager.getToolsByServer(id)) {
+            if (enabledNames.has(tool.name)) {
+              filteredTools.push(tool);
+              toolsUsed.push(tool.name);
+            }
+          }
+        }
+
+        const mastraRequest: MastraRequest = {
           prompt,
           tools: filteredTools,
           context: {
@@ -115,41 +146,33 @@ export const agentRoutes = new Elysia({ prefix: "/agent" })
                 }
               : undefined,
           },
-        });
+        };
 
-        await db
-          .update(agentRuns)
-          .set({
-            status: "completed",
-            response,
-            completedAt: new Date(),
-          })
-          .where(eq(agentRuns.id, run.id));
+        // Clients that accept SSE get chunks as they are produced instead of
+        // waiting for the full response
+        if (request.headers.get("accept")?.includes("text/event-stream")) {
+          return streamAgentRun(run.id, mastraRequest, toolsUsed);
+        }
+
+        const response = await executeWithMastra(mastraRequest);
+
+        await completeRun(run.id, response);
 
         return {
           success: true,
           data: {
             runId: run.id,
             response,
-            toolsUsed: filteredTools.map((t) => t.name),
+            toolsUsed,
           },
         };
       } catch (error) {
-        await db
-          .update(agentRuns)
-          .set({
-            status: "failed",
-            errorMessage: (error as Error).message,
-            completedAt: new Date(),
-          })
-          .where(eq(agentRuns.id, run.id));
+        await failRun(run.id, error as Error);
 
         return {
           success: false,
           error: (error as Error).message,
         };
-      } finally {
-        await mcpClientManager.disconnectAll();
       }
     },
     {
@@ -202,11 +225,7 @@ export const agentRoutes = new Elysia({ prefix: "/agent" })
     };
   });
 
-async function executeWithMastra({
-  prompt,
-  tools,
-  context,
-}: {
+interface MastraRequest {
   prompt: string;
   tools: any[];
   context: {
@@ -220,9 +239,135 @@ async function executeWithMastra({
       organizationName?: string;
     };
   };
-}): Promise<string> {
+}
+
+async function completeRun(runId: string, response: string): Promise<void> {
+  await db
+    .update(agentRuns)
+    .set({
+      status: "completed",
+      response,
+      completedAt: new Date(),
+    })
+    .where(eq(agentRuns.id, runId));
+}
+
+async function failRun(runId: string, error: Error): Promise<void> {
+  await db
+    .update(agentRuns)
+    .set({
+      status: "failed",
+      errorMessage: error.message,
+      completedAt: new Date(),
+    })
+    .where(eq(agentRuns.id, runId));
+}
+
+async function cancelRun(runId: string): Promise<void> {
+  await db
+    .update(agentRuns)
+    .set({
+      status: "cancelled",
+      errorMessage: "Client disconnected",
+      completedAt: new Date(),
+    })
+    .where(eq(agentRuns.id, runId));
+}
+
+/**
+ * Stream an agent run as Server-Sent Events
+ * Deltas are coalesced per batching window and sent as
+ * `data: {"deltas": [...]}`, followed by a final `done` (or `error`) event
+ * If the client disconnects, generation stops and the run is marked cancelled
+ */
+function streamAgentRun(
+  runId: string,
+  request: MastraRequest,
+  toolsUsed: string[],
+): Response {
+  const encoder = new TextEncoder();
+
+  // Set once the client goes away; from then on nothing is written, and the
+  // run is recorded by what actually happened rather than by delivery errors
+  let closed = false;
+
+  const stream = new ReadableStream<Uint8Array>({
+    async start(controller) {
+      const send = (data: unknown, event?: string) => {
+        if (closed) return;
+        const prefix = event ? `event: ${event}\n` : "";
+        try {
+          controller.enqueue(
+            encoder.encode(`${prefix}data: ${JSON.stringify(data)}\n\n`),
+          );
+        } catch {
+          closed = true;
+        }
+      };
+
+      let response = "";
+
+      try {
+        for await (const deltas of batchChunks(
+          streamWithMastra(request),
+          STREAM_MAX_CHUNKS,
+          STREAM_MAX_DELAY_MS,
+        )) {
+          response += deltas.join("");
+          send({ deltas });
+
+          // Stop generating for a client that is no longer listening
+          if (closed) break;
+        }
+
+        if (closed) {
+          await cancelRun(runId);
+        } else {
+          await completeRun(runId, response);
+          send({ runId, toolsUsed }, "done");
+        }
+      } catch (error) {
+        await failRun(runId, error as Error).catch((dbError) => {
+          console.error(`❌ Failed to record failure for run ${runId}:`, dbError);
+        });
+        send({ runId, error: (error as Error).message }, "error");
+      } finally {
+        if (!closed) {
+          closed = true;
+          controller.close();
+        }
+      }
+    },
+    cancel() {
+      closed = true;
+    },
+  });
+
+  return new Response(stream, {
+    headers: {
+      "Content-Type": "text/event-stream",
+      "Cache-Control": "no-cache",
+      Connection: "keep-alive",
+    },
+  });
+}
+
+async function executeWithMastra(request: MastraRequest): Promise<string> {
+  let response = "";
+  for await (const delta of streamWithMastra(request)) {
+    response += delta;
+  }
+  return response;
+}
+
+async function* streamWithMastra({
+  prompt,
+  tools,
+  context,
+}: MastraRequest): AsyncGenerator<string> {
   if (tools.length === 0) {
-    return `I received: "${prompt}"\n\nNo tools enabled. Connect GitHub, Slack, or Linear first.`;
+    yield `I received: "${prompt}"\n\nNo tools enabled. Connect GitHub, Slack, or Linear first.`;
+    return;
   }
 
   const toolList = tools.map((t) => t.name).join(", ");
@@ -230,7 +375,11 @@ async function executeWithMastra({
     ? `connected (${context.linearConnection.userName} @ ${context.linearConnection.organizationName})`
     : "not connected";
 
-  // TODO: Implement actual Mastra integration
-  // For now, return a placeholder that shows tool availability
-  return `I received: "${prompt}"\n\nAvailable tools: ${toolList}\n\nContext:\n- user=${context.userId}\n- github=${context.githubAccount || "not connected"}\n- linear=${linearStatus}\n\n[Note: Mastra integration not yet implemented. In production, Mastra would analyze this prompt and call appropriate tools via MCP.]\n\nTo use Linear tools, the system would:\n1. Pass your OAuth token securely to the MCP server\n2. Execute the GraphQL query\n3. Return formatted results\n\nYour Linear token is stored securely and NEVER exposed to the LLM.`;
+  // TODO: Implement actual Mastra integration and yield its stream deltas
+  // For now, emit a placeholder line by line that shows tool availability
+  const placeholder = `I received: "${prompt}"\n\nAvailable tools: ${toolList}\n\nContext:\n- user=${context.userId}\n- github=${context.githubAccount || "not connected"}\n- linear=${linearStatus}\n\n[Note: Mastra integration not yet implemented. In production, Mastra would analyze this prompt and call appropriate tools via MCP.]\n\nTo use Linear tools, the system would:\n1. Pass your OAuth token securely to the MCP server\n2. Execute the GraphQL query\n3. Return formatted results\n\nYour Linear token is stored securely and NEVER exposed to the LLM.`;
+
+  for (const line of placeholder.split(/(?<=\n)/)) {
+    yield line;
+  }
 }
@@ -1,11 +1,58 @@
 import { Elysia, t } from "elysia";
-import { db, schema } from "@backend/db";
-import { eq, and, desc } from "drizzle-orm";
+import { db, schema, type LinearEvent } from "@backend/db";
+import { eq, and, desc, gt, sql } from "drizzle-orm";
 import { jwtAuthMiddleware } from "@/middleware/jwt-auth";
+import { TtlCache } from "@/lib/ttl-cache";
+import { timingSafeEqual } from "crypto";
+import { parsePage } from "@/lib/pagination";
 
 const { linearEvents, linearConnections } = schema;
 
 const LINEAR_WEBHOOK_SECRET = process.env.LINEAR_WEBHOOK_SECRET || "";
+const EXPECTED_AUTH_HEADER = Buffer.from(`Bearer ${LINEAR_WEBHOOK_SECRET}`);
+
+// Prepared once: every webhook runs these lookups, so Postgres can reuse
+// the parsed plan instead of re-planning the same SQL per request
+const findConnectionByOrganization = db.query.linearConnections
+  .findFirst({
+    where: eq(linearConnections.linearOrganizationId, sql.placeholder("organizationId")),
+    columns: { userId: true },
+  })
+  .prepare("linear_connection_by_organization");
+
+const findEventByWebhookId = db.query.linearEvents
+  .findFirst({
+    where: eq(linearEvents.webhookId, sql.placeholder("webhookId")),
+    columns: { id: true },
+  })
+  .prepare("linear_event_by_webhook_id");
+
+// Linear organization ID -> owning user ID. Webhooks for one organization
+// arrive in bursts, so skip the lookup for recently seen organizations.
+// Only linked connections are cached, and linking or disconnecting through
+// /oauth deletes the organization's entry
+export const organizationUserCache = new TtlCache<string, string>(
+  parseInt(process.env.LINEAR_ORG_CACHE_TTL_MS || "60000"),
+  1000,
+);
+
+/**
+ * Resolve the user that owns a Linear organization's connection
+ */
+async function getOrganizationUserId(organizationId: string): Promise<string | null> {
+  const cached = organizationUserCache.get(organizationId);
+  if (cached) {
+    return cached;
+  }
+
+  const connection = await findConnectionByOrganization.execute({ organizationId });
+  if (!connection?.userId) {
+    return null;
+  }
+
+  organizationUserCache.set(organizationId, connection.userId);
+  return connection.userId;
+}
 
 /**
  * Verify Linear webhook signature
@@ -22,116 +69,152 @@ function verifyLinearWebhook(authHeader: string | null): boolean {
   }
 
   // Linear sends: Authorization: Bearer <webhook-secret>
-  const parts = authHeader.split(" ");
-  if (parts.length !== 2 || parts[0] !== "Bearer") {
-    return false;
-  }
-
-  return parts[1] === LINEAR_WEBHOOK_SECRET;
+  // Timing-safe comparison
+  const received = Buffer.from(authHeader);
+  return (
+    received.length === EXPECTED_AUTH_HEADER.length &&
+    timingSafeEqual(received, EXPECTED_AUTH_HEADER)
+  );
 }
 
-/**
- * Determine if AI should react to this event
- */
-function shouldAiReactToEvent(eventData: any): {
+// Issue state names containing either word (any case) are escalated.
+// One compiled pattern replaces lowercasing plus a substring scan per keyword
+const CRITICAL_STATE_PATTERN = /urgent|critical/i;
+
+// Project states that trigger a retrospective
+const CLOSED_PROJECT_STATES = new Set(["completed", "canceled"]);
+
+const ONE_DAY_MS = 24 * 60 * 60 * 1000;
+
+interface AiDecision {
   shouldReact: boolean;
   reason: string;
   suggestedAction?: string;
-} {
-  const { type, data } = eventData;
+}
 
-  // Issue-related events
-  if (type === "Issue") {
-    const action = data?.updatedFrom ? "updated" : "created";
-    const state = data?.state?.name || "";
-    const priority = data?.priority || 0;
+const NO_AI_REACTION: AiDecision = {
+  shouldReact: false,
+  reason: "Event does not meet AI reaction criteria",
+};
 
-    // High priority issues
-    if (priority >= 3) {
-      return {
-        shouldReact: true,
-        reason: "High priority issue",
-        suggestedAction: "notify_team",
-      };
-    }
+/**
+ * Issue events - priority, critical states, assignment
+ */
+function issueReaction(data: any): AiDecision | null {
+  const state = data?.state?.name || "";
+  const priority = data?.priority || 0;
 
-    // Issues moved to specific states
-    if (state.toLowerCase().includes("urgent") || state.toLowerCase().includes("critical")) {
-      return {
-        shouldReact: true,
-        reason: "Issue moved to critical state",
-        suggestedAction: "escalate",
-      };
-    }
+  // High priority issues
+  if (priority >= 3) {
+    return {
+      shouldReact: true,
+      reason: "High priority issue",
+      suggestedAction: "notify_team",
+    };
+  }
 
-    // Issues assigned to specific users
-    if (data?.assignee?.id) {
-      return {
-        shouldReact: false,
-        reason: "Issue assigned normally",
-      };
-    }
+  // Issues moved to specific states
+  if (CRITICAL_STATE_PATTERN.test(state)) {
+    return {
+      shouldReact: true,
+      reason: "Issue moved to critical state",
+      suggestedAction: "escalate",
+    };
   }
 
-  // Comment events - check if mentions or important
-  if (type === "Comment") {
-    const body = data?.body || "";
-    
-    // Comments with mentions
-    if (body.includes("@") || body.includes("<a ")) {
-      return {
-        shouldReact: true,
-        reason: "Comment with mentions",
-        suggestedAction: "notify_mentioned",
-      };
-    }
+  // Issues assigned to specific users
+  if (data?.assignee?.id) {
+    return {
+      shouldReact: false,
+      reason: "Issue assigned normally",
+    };
+  }
 
-    // Comments on high priority issues
-    if (data?.issue?.priority >= 3) {
-      return {
-        shouldReact: true,
-        reason: "Comment on high priority issue",
-        suggestedAction: "summarize",
-      };
-    }
+  return null;
+}
+
+/**
+ * Comment events - check if mentions or important
+ */
+function commentReaction(data: any): AiDecision | null {
+  const body = data?.body || "";
+
+  // Comments with mentions
+  if (body.includes("@") || body.includes("<a ")) {
+    return {
+      shouldReact: true,
+      reason: "Comment with mentions",
+      suggestedAction: "notify_mentioned",
+    };
   }
 
-  // Cycle events
-  if (type === "Cycle") {
-    const action = data?.updatedFrom ? "updated" : "created";
-    
-    if (action === "created" && data?.startsAt) {
-      const startDate = new Date(data.startsAt);
-      const today = new Date();
-      const diffDays = Math.ceil((startDate.getTime() - today.getTime()) / (1000 * 60 * 60 * 24));
-      
-      if (diffDays <= 1) {
-        return {
-          shouldReact: true,
-          reason: "Cycle starting soon",
-          suggestedAction: "prepare_cycle_summary",
-        };
-      }
-    }
+  // Comments on high priority issues
+  if (data?.issue?.priority >= 3) {
+    return {
+      shouldReact: true,
+      reason: "Comment on high priority issue",
+      suggestedAction: "summarize",
+    };
   }
 
-  // Project events
-  if (type === "Project") {
-    const state = data?.state || "";
-    
-    if (state === "completed" || state === "canceled") {
+  return null;
+}
+
+/**
+ * Cycle events - cycles starting soon
+ */
+function cycleReaction(data: any): AiDecision | null {
+  const action = data?.updatedFrom ? "updated" : "created";
+
+  if (action === "created" && data?.startsAt) {
+    // Plain epoch-millisecond arithmetic; no Date objects needed
+    const diffDays = Math.ceil((Date.parse(data.startsAt) - Date.now()) / ONE_DAY_MS);
+
+    if (diffDays <= 1) {
       return {
         shouldReact: true,
-        reason: "Project completed or canceled",
-        suggestedAction: "project_retrospective",
+        reason: "Cycle starting soon",
+        suggestedAction: "prepare_cycle_summary",
       };
     }
   }
 
-  return {
-    shouldReact: false,
-    reason: "Event does not meet AI reaction criteria",
-  };
+  return null;
+}
+
+/**
+ * Project events - completed or canceled projects
+ */
+function projectReaction(data: any): AiDecision | null {
+  const state = data?.state || "";
+
+  if (CLOSED_PROJECT_STATES.has(state)) {
+    return {
+      shouldReact: true,
+      reason: "Project completed or canceled",
+      suggestedAction: "project_retrospective",
+    };
+  }
+
+  return null;
+}
+
+// Reaction rules by Linear event type
+const AI_REACTION_RULES = new Map<string, (data: any) => AiDecision | null>([
+  ["Issue", issueReaction],
+  ["Comment", commentReaction],
+  ["Cycle", cycleReaction],
+  ["Project", projectReaction],
+]);
+
+/**
+ * Determine if AI should react to this event
+ */
+function shouldAiReactToEvent(eventData: any): AiDecision {
+  const { type, data } = eventData;
+  const rule = AI_REACTION_RULES.get(type);
+
+  return rule?.(data) ?? NO_AI_REACTION;
 }
 
 /**
@@ -200,20 +283,16 @@ export const linearEventsRoutes = new Elysia({ prefix: "/linear" })
         return { success: false, error: "Invalid organization" };
       }
 
-      // Find the user connection for this organization
-      const connection = await db.query.linearConnections.findFirst({
-        where: eq(linearConnections.linearOrganizationId, organizationId),
-      });
+      // Find the user connected to this organization
+      const userId = await getOrganizationUserId(organizationId);
 
-      if (!connection) {
+      if (!userId) {
         console.warn(`⚠️ No Linear connection found for organization: ${organizationId}`);
         // Still store the event but mark with no user
       }
 
       // Check for duplicate
-      const existing = await db.query.linearEvents.findFirst({
-        where: eq(linearEvents.webhookId, webhookId),
-      });
+      const existing = await findEventByWebhookId.execute({ webhookId });
 
       if (existing) {
         console.log(`⏭️ Duplicate webhook ${webhookId}, skipping`);
@@ -229,7 +308,7 @@ export const linearEventsRoutes = new Elysia({ prefix: "/linear" })
       // Store the event
       const inserted = await db.insert(linearEvents).values({
         organizationId,
-        userId: connection?.userId || null,
+        userId,
         eventType,
         webhookId,
         eventTimestamp: timestamp,
@@ -259,9 +338,9 @@ export const linearEventsRoutes = new Elysia({ prefix: "/linear" })
       console.log(`🤖 AI should react: ${aiDecision.shouldReact} (${aiDecision.reason})`);
 
       // If AI should react, trigger async processing
-      if (aiDecision.shouldReact && connection?.userId) {
+      if (aiDecision.shouldReact && userId) {
         // Trigger async processing (non-blocking)
-        processLinearEvent(event.id, aiDecision).catch(err => {
+        processLinearEvent(event, aiDecision).catch(err => {
           console.error(`❌ Error processing Linear event ${event.id}:`, err);
         });
       }
@@ -295,7 +374,7 @@ export const linearEventsRoutes = new Elysia({ prefix: "/linear" })
         return { success: false, error: "Unauthorized" };
       }
 
-      const limit = parseInt(query.limit || "50");
+      const { limit, offset } = parsePage(query);
       const eventType = query.type;
       const processed = query.processed;
       const shouldReact = query.shouldReact;
@@ -316,8 +395,28 @@ export const linearEventsRoutes = new Elysia({ prefix: "/linear" })
 
       const events = await db.query.linearEvents.findMany({
         where: conditions,
+        // Only the listed fields; the full jsonb payload stays in the
+        // database, except the cycle name the preview needs
+        columns: {
+          id: true,
+          eventType: true,
+          organizationId: true,
+          actorName: true,
+          issueIdentifier: true,
+          issueTitle: true,
+          projectName: true,
+          teamName: true,
+          processed: true,
+          shouldAiReact: true,
+          aiReactionTriggered: true,
+          createdAt: true,
+        },
+        extras: (table, { sql }) => ({
+          cycleName: sql<string | null>`${table.eventData}->'data'->>'name'`.as("cycle_name"),
+        }),
         orderBy: [desc(linearEvents.createdAt)],
-        limit: limit,
+        limit,
+        offset,
       });
 
       return {
@@ -338,12 +437,15 @@ export const linearEventsRoutes = new Elysia({ prefix: "/linear" })
             preview: getEventPreview(e),
           })),
           count: events.length,
+          limit,
+          offset,
         },
       };
     },
     {
       query: t.Object({
         limit: t.Optional(t.String()),
+        offset: t.Optional(t.String()),
         type: t.Optional(t.String()),
         processed: t.Optional(t.String()),
         shouldReact: t.Optional(t.String()),
@@ -385,27 +487,42 @@ export const linearEventsRoutes = new Elysia({ prefix: "/linear" })
       return { success: false, error: "Unauthorized" };
     }
 
-    const events = await db.query.linearEvents.findMany({
-      where: eq(linearEvents.userId, user.id),
-    });
+    const oneDayAgo = new Date(Date.now() - ONE_DAY_MS);
+
+    // One grouped scan yields every counter: the flag totals are filtered
+    // counts per type, summed here over at most a handful of rows
+    const rows = await db
+      .select({
+        eventType: linearEvents.eventType,
+        total: sql<number>`count(*)::int`,
+        processed: sql<number>`count(*) filter (where ${linearEvents.processed})::int`,
+        shouldReact: sql<number>`count(*) filter (where ${linearEvents.shouldAiReact})::int`,
+        aiTriggered: sql<number>`count(*) filter (where ${linearEvents.aiReactionTriggered})::int`,
+        recent: sql<number>`count(*) filter (where ${gt(linearEvents.createdAt, oneDayAgo)})::int`,
+      })
+      .from(linearEvents)
+      .where(eq(linearEvents.userId, user.id))
+      .groupBy(linearEvents.eventType);
 
     const stats = {
-      total: events.length,
+      total: 0,
       byType: {} as Record<string, number>,
-      processed: events.filter((e) => e.processed).length,
-      unprocessed: events.filter((e) => !e.processed).length,
-      shouldReact: events.filter((e) => e.shouldAiReact).length,
-      aiTriggered: events.filter((e) => e.aiReactionTriggered).length,
-      recent: events.filter((e) => {
-        if (!e.createdAt) return false;
-        const oneDayAgo = new Date(Date.now() - 24 * 60 * 60 * 1000);
-        return new Date(e.createdAt) > oneDayAgo;
-      }).length,
+      processed: 0,
+      unprocessed: 0,
+      shouldReact: 0,
+      aiTriggered: 0,
+      recent: 0,
     };
 
-    events.forEach((event) => {
-      stats.byType[event.eventType] = (stats.byType[event.eventType] || 0) + 1;
-    });
+    for (const row of rows) {
+      stats.total += row.total;
+      stats.processed += row.processed;
+      stats.shouldReact += row.shouldReact;
+      stats.aiTriggered += row.aiTriggered;
+      stats.recent += row.recent;
+      stats.byType[row.eventType] = row.total;
+    }
+    stats.unprocessed = stats.total - stats.processed;
 
     return {
       success: true,
@@ -458,7 +575,7 @@ export const linearEventsRoutes = new Elysia({ prefix: "/linear" })
       }
 
       // Trigger AI reaction
-      const result = await processLinearEvent(event.id, {
+      const result = await processLinearEvent(event, {
         shouldReact: true,
         reason: "Manual trigger",
       });
@@ -487,7 +604,7 @@ function getEventPreview(event: any): string {
     case "Comment":
       return `Comment on ${event.issueIdentifier || "issue"}`;
     case "Cycle":
-      return `Cycle: ${event.eventData?.data?.name || "Unknown"}`;
+      return `Cycle: ${event.cycleName || "Unknown"}`;
     case "Project":
       return `Project: ${event.projectName || "Unknown"}`;
     case "Team":
@@ -499,23 +616,17 @@ function getEventPreview(event: any): string {
 
 /**
  * Process a Linear event and optionally trigger AI reactions
- * This runs asynchronously
+ * This runs asynchronously. Callers pass the row they already hold, so it
+ * isn't read back from the database
  */
 async function processLinearEvent(
-  eventId: string,
-  decision: { shouldReact: boolean; reason: string; suggestedAction?: string }
+  event: LinearEvent,
+  decision: AiDecision
 ): Promise<any> {
+  const eventId = event.id;
   console.log(`🤖 Processing Linear event ${eventId}: ${decision.reason}`);
 
   try {
-    const event = await db.query.linearEvents.findFirst({
-      where: eq(linearEvents.id, eventId),
-    });
-
-    if (!event) {
-      throw new Error("Event not found");
-    }
-
     if (!event.userId) {
       throw new Error("No user associated with this event");
     }
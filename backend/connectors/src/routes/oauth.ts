@@ -1,11 +1,31 @@
 import { Elysia, t } from "elysia";
 import { db, schema } from "@backend/db";
-import { eq } from "drizzle-orm";
+import { eq, and, or, isNull } from "drizzle-orm";
 import { jwtAuthMiddleware } from "@/middleware/jwt-auth";
 import { encrypt, decryptSafe } from "@/lib/encryption";
 import { generatePKCE, storePkceChallenge, getPkceVerifier } from "@/lib/pkce";
+import { teamUserCache } from "@/lib/slack-token";
+import { organizationUserCache } from "@/routes/linear-events";
+import { timingSafeEqual } from "crypto";
 
 const GITHUB_WEBHOOK_SECRET = process.env.GITHUB_WEBHOOK_SECRET || "";
+const GITHUB_APP_NAME = process.env.GITHUB_APP_NAME || "";
+
+const LINEAR_CLIENT_ID = process.env.LINEAR_CLIENT_ID || "";
+const LINEAR_CLIENT_SECRET = process.env.LINEAR_CLIENT_SECRET || "";
+const LINEAR_REDIRECT_URI = process.env.LINEAR_REDIRECT_URI || "";
+
+// Only varies with the app name, so build it once
+const GITHUB_INSTALL_URL = `https://github.com/apps/${encodeURIComponent(GITHUB_APP_NAME)}/installations/new`;
+
+// Scopes requested from Linear, and assumed when the token response omits them
+const LINEAR_SCOPE = "read write issues:create issues:update";
+const LINEAR_DEFAULT_SCOPES = ["read", "write"];
+
+// Keyed once and copied per webhook, so HMAC key setup isn't repeated
+const webhookHmac = GITHUB_WEBHOOK_SECRET
+  ? new Bun.CryptoHasher("sha256", GITHUB_WEBHOOK_SECRET)
+  : null;
 
 /**
  * Verify GitHub webhook signature using HMAC-SHA256
@@ -14,7 +34,7 @@ function verifyGitHubSignature(
   payload: string,
   signature: string | null
 ): boolean {
-  if (!GITHUB_WEBHOOK_SECRET) {
+  if (!webhookHmac) {
     console.warn("GITHUB_WEBHOOK_SECRET not set, skipping verification");
     return true;
   }
@@ -23,17 +43,62 @@ function verifyGitHubSignature(
     return false;
   }
 
-  const expectedSignature = signature.slice(7); // Remove 'sha256=' prefix
-  const hmac = new Bun.CryptoHasher("sha256", GITHUB_WEBHOOK_SECRET);
+  const expectedSignature = Buffer.from(signature.slice(7), "hex"); // Remove 'sha256=' prefix
+  const hmac = webhookHmac.copy();
   hmac.update(payload);
-  const computedSignature = hmac.digest("hex");
+  const computedSignature = hmac.digest();
 
-  // Timing-safe comparison
-  return computedSignature === expectedSignature;
+  // Timing-safe comparison on the raw digest bytes
+  return (
+    expectedSignature.length === computedSignature.length &&
+    timingSafeEqual(expectedSignature, computedSignature)
+  );
 }
 
 const { githubInstallations, slackConnections, linearConnections } = schema;
 
+/**
+ * Deactivate a user's connection, keyed by provider name
+ */
+const disconnectByProvider = new Map<string, (userId: string) => Promise<unknown>>([
+  [
+    "github",
+    (userId) =>
+      db
+        .update(githubInstallations)
+        .set({ isActive: false })
+        .where(eq(githubInstallations.userId, userId)),
+  ],
+  [
+    "slack",
+    async (userId) => {
+      const teams = await db
+        .update(slackConnections)
+        .set({ isActive: false })
+        .where(eq(slackConnections.userId, userId))
+        .returning({ teamId: slackConnections.teamId });
+
+      for (const { teamId } of teams) {
+        teamUserCache.delete(teamId);
+      }
+    },
+  ],
+  [
+    "linear",
+    async (userId) => {
+      const organizations = await db
+        .update(linearConnections)
+        .set({ isActive: false })
+        .where(eq(linearConnections.userId, userId))
+        .returning({ organizationId: linearConnections.linearOrganizationId });
+
+      for (const { organizationId } of organizations) {
+        if (organizationId) organizationUserCache.delete(organizationId);
+      }
+    },
+  ],
+]);
+
 export const oauthRoutes = new Elysia({ prefix: "/oauth" })
   // ==========================================
   // LINEAR OAUTH FLOW
@@ -41,10 +106,7 @@ export const oauthRoutes = new Elysia({ prefix: "/oauth" })
 
   // Get Linear OAuth URL
   .get("/linear", async ({ query }) => {
-    const clientId = process.env.LINEAR_CLIENT_ID;
-    const redirectUri = process.env.LINEAR_REDIRECT_URI;
-
-    if (!clientId || !redirectUri) {
+    if (!LINEAR_CLIENT_ID || !LINEAR_REDIRECT_URI) {
       return {
         success: false,
         error: "Linear OAuth not configured",
@@ -52,7 +114,6 @@ export const oauthRoutes = new Elysia({ prefix: "/oauth" })
     }
 
     const state = crypto.randomUUID();
-    const scope = "read write issues:create issues:update";
 
     // Generate PKCE pair for OAuth 2.1 security
     const pkce = generatePKCE();
@@ -61,10 +122,10 @@ export const oauthRoutes = new Elysia({ prefix: "/oauth" })
     await storePkceChallenge(state, pkce.codeVerifier);
 
     const params = new URLSearchParams({
-      client_id: clientId,
-      redirect_uri: redirectUri,
+      client_id: LINEAR_CLIENT_ID,
+      redirect_uri: LINEAR_REDIRECT_URI,
       response_type: "code",
-      scope,
+      scope: LINEAR_SCOPE,
       state,
       code_challenge: pkce.codeChallenge,
       code_challenge_method: pkce.codeChallengeMethod,
@@ -91,11 +152,7 @@ export const oauthRoutes = new Elysia({ prefix: "/oauth" })
       };
     }
 
-    const clientId = process.env.LINEAR_CLIENT_ID;
-    const clientSecret = process.env.LINEAR_CLIENT_SECRET;
-    const redirectUri = process.env.LINEAR_REDIRECT_URI;
-
-    if (!clientId || !clientSecret || !redirectUri) {
+    if (!LINEAR_CLIENT_ID || !LINEAR_CLIENT_SECRET || !LINEAR_REDIRECT_URI) {
       return {
         success: false,
         error: "Linear OAuth not configured",
@@ -123,10 +180,10 @@ export const oauthRoutes = new Elysia({ prefix: "/oauth" })
         },
         body: JSON.stringify({
           grant_type: "authorization_code",
-          client_id: clientId,
-          client_secret: clientSecret,
+          client_id: LINEAR_CLIENT_ID,
+          client_secret: LINEAR_CLIENT_SECRET,
           code,
-          redirect_uri: redirectUri,
+          redirect_uri: LINEAR_REDIRECT_URI,
           code_verifier: codeVerifier, // PKCE verification
         }),
       });
@@ -143,8 +200,10 @@ export const oauthRoutes = new Elysia({ prefix: "/oauth" })
       const { access_token, refresh_token, expires_in, scope } = tokenData;
 
       // Encrypt tokens before storing
-      const encryptedAccessToken = encrypt(access_token);
-      const encryptedRefreshToken = refresh_token ? encrypt(refresh_token) : null;
+      const [encryptedAccessToken, encryptedRefreshToken] = await Promise.all([
+        encrypt(access_token),
+        refresh_token ? encrypt(refresh_token) : null,
+      ]);
 
       // Fetch user info from Linear
       const userResponse = await fetch("https://api.linear.app/graphql", {
@@ -202,7 +261,7 @@ export const oauthRoutes = new Elysia({ prefix: "/oauth" })
           linearUserName: viewer.name,
           linearOrganizationId: viewer.organization?.id,
           linearOrganizationName: viewer.organization?.name,
-          scopes: scope?.split(" ") || ["read", "write"],
+          scopes: scope?.split(" ") || LINEAR_DEFAULT_SCOPES,
           isActive: true,
         })
         .returning();
@@ -247,29 +306,41 @@ export const oauthRoutes = new Elysia({ prefix: "/oauth" })
 
       const { connectionId } = body as { connectionId: string };
 
-      const connection = await db.query.linearConnections.findFirst({
-        where: eq(linearConnections.id, connectionId),
-      });
+      // Claim the connection only if it is still unlinked, in one statement;
+      // this also stops two users racing to link the same connection
+      const [connection] = await db
+        .update(linearConnections)
+        .set({ userId: user.id })
+        .where(and(eq(linearConnections.id, connectionId), isNull(linearConnections.userId)))
+        .returning({
+          linearUserName: linearConnections.linearUserName,
+          linearOrganizationId: linearConnections.linearOrganizationId,
+          linearOrganizationName: linearConnections.linearOrganizationName,
+        });
 
       if (!connection) {
-        return { success: false, error: "Connection not found" };
-      }
+        // Only the failure path needs to know why
+        const existing = await db.query.linearConnections.findFirst({
+          where: eq(linearConnections.id, connectionId),
+          columns: { id: true },
+        });
 
-      if (connection.userId !== null) {
-        return { success: false, error: "Connection already linked" };
+        return {
+          success: false,
+          error: existing ? "Connection already linked" : "Connection not found",
+        };
       }
 
-      await db
-        .update(linearConnections)
-        .set({ userId: user.id })
-        .where(eq(linearConnections.id, connectionId));
+      if (connection.linearOrganizationId) {
+        organizationUserCache.delete(connection.linearOrganizationId);
+      }
 
       return {
         success: true,
         data: {
           message: "Linear connected successfully",
-          linearUser: connection?.linearUserName,
-          organization: connection?.linearOrganizationName,
+          linearUser: connection.linearUserName,
+          organization: connection.linearOrganizationName,
         },
       };
     },
@@ -286,9 +357,7 @@ export const oauthRoutes = new Elysia({ prefix: "/oauth" })
 
   // Get GitHub App installation URL
   .get("/github", async () => {
-    const appName = process.env.GITHUB_APP_NAME;
-
-    if (!appName) {
+    if (!GITHUB_APP_NAME) {
       return {
         success: false,
         error: "GitHub App not configured",
@@ -298,7 +367,7 @@ export const oauthRoutes = new Elysia({ prefix: "/oauth" })
     return {
       success: true,
       data: {
-        url: `https://github.com/apps/${appName}/installations/new`,
+        url: GITHUB_INSTALL_URL,
         message: "Install the GitHub App to connect your repositories",
       },
     };
@@ -320,42 +389,33 @@ export const oauthRoutes = new Elysia({ prefix: "/oauth" })
       const { action, installation } = body as any;
 
       if (action === "created" || action === "added") {
-        // Check if installation already exists
-        const existing = await db.query.githubInstallations.findFirst({
-          where: eq(githubInstallations.installationId, installation.id),
-        });
-
-        if (existing) {
-          // Update existing installation
-          await db
-            .update(githubInstallations)
-            .set({
-              repositories: (installation.repositories || []).map((r: any) => ({
-                id: r.id,
-                name: r.name,
-                fullName: r.full_name,
-                private: r.private,
-              })),
-              isActive: true,
-              updatedAt: new Date(),
-            })
-            .where(eq(githubInstallations.installationId, installation.id));
-        } else {
-          // Create new installation (userId is null until linked)
-          await db.insert(githubInstallations).values({
+        const repositories = (installation.repositories || []).map((r: any) => ({
+          id: r.id,
+          name: r.name,
+          fullName: r.full_name,
+          private: r.private,
+        }));
+
+        // Create the installation, or reactivate it if it already exists,
+        // in one statement (userId is null until linked)
+        await db
+          .insert(githubInstallations)
+          .values({
             userId: null, // Will be linked via /github/link endpoint
             installationId: installation.id,
             accountLogin: installation.account?.login,
             accountType: installation.account?.type,
-            repositories: (installation.repositories || []).map((r: any) => ({
-              id: r.id,
-              name: r.name,
-              fullName: r.full_name,
-              private: r.private,
-            })),
+            repositories,
             isActive: true,
+          })
+          .onConflictDoUpdate({
+            target: githubInstallations.installationId,
+            set: {
+              repositories,
+              isActive: true,
+              updatedAt: new Date(),
+            },
           });
-        }
 
         return { success: true, message: "GitHub App installed" };
       }
@@ -399,28 +459,30 @@ export const oauthRoutes = new Elysia({ prefix: "/oauth" })
 
       const { installationId } = body;
 
-      const installation = await db.query.githubInstallations.findFirst({
-        where: eq(githubInstallations.installationId, installationId),
-      });
+      // Link if unlinked or already linked to this user, in one statement
+      const [installation] = await db
+        .update(githubInstallations)
+        .set({ userId: user.id })
+        .where(
+          and(
+            eq(githubInstallations.installationId, installationId),
+            or(isNull(githubInstallations.userId), eq(githubInstallations.userId, user.id)),
+          ),
+        )
+        .returning({ repositories: githubInstallations.repositories });
 
       if (!installation) {
-        return { success: false, error: "Installation not found" };
-      }
+        const existing = await db.query.githubInstallations.findFirst({
+          where: eq(githubInstallations.installationId, installationId),
+          columns: { id: true },
+        });
 
-      if (installation.userId !== null) {
-        // Installation already linked to a user
-        // Only allow if it's the same user
-        if (installation.userId !== user.id) {
-          return { success: false, error: "Installation linked to another user" };
-        }
-        // Already linked to this user, return success
+        return {
+          success: false,
+          error: existing ? "Installation linked to another user" : "Installation not found",
+        };
       }
 
-      await db
-        .update(githubInstallations)
-        .set({ userId: user.id })
-        .where(eq(githubInstallations.installationId, installationId));
-
       return {
         success: true,
         data: {
@@ -443,17 +505,27 @@ export const oauthRoutes = new Elysia({ prefix: "/oauth" })
       return { success: false, error: "Unauthorized" };
     }
 
-    const github = await db.query.githubInstallations.findFirst({
-      where: eq(githubInstallations.userId, user.id),
-    });
-
-    const slack = await db.query.slackConnections.findFirst({
-      where: eq(slackConnections.userId, user.id),
-    });
-
-    const linear = await db.query.linearConnections.findFirst({
-      where: eq(linearConnections.userId, user.id),
-    });
+    // Independent lookups: run them concurrently, and select only the
+    // columns shown so encrypted tokens never leave the database
+    const [github, slack, linear] = await Promise.all([
+      db.query.githubInstallations.findFirst({
+        where: eq(githubInstallations.userId, user.id),
+        columns: { installationId: true, accountLogin: true, repositories: true, isActive: true },
+      }),
+      db.query.slackConnections.findFirst({
+        where: eq(slackConnections.userId, user.id),
+        columns: { teamName: true, scopes: true, isActive: true },
+      }),
+      db.query.linearConnections.findFirst({
+        where: eq(linearConnections.userId, user.id),
+        columns: {
+          linearUserName: true,
+          linearOrganizationName: true,
+          scopes: true,
+          isActive: true,
+        },
+      }),
+    ]);
 
     return {
       success: true,
@@ -500,22 +572,7 @@ export const oauthRoutes = new Elysia({ prefix: "/oauth" })
 
       const { provider } = params;
 
-      if (provider === "github") {
-        await db
-          .update(githubInstallations)
-          .set({ isActive: false })
-          .where(eq(githubInstallations.userId, user.id));
-      } else if (provider === "slack") {
-        await db
-          .update(slackConnections)
-          .set({ isActive: false })
-          .where(eq(slackConnections.userId, user.id));
-      } else if (provider === "linear") {
-        await db
-          .update(linearConnections)
-          .set({ isActive: false })
-          .where(eq(linearConnections.userId, user.id));
-      }
+      await disconnectByProvider.get(provider)?.(user.id);
 
       return {
         success: true,
@@ -1,27 +1,80 @@
 import { Elysia, t } from "elysia";
 import { db, schema } from "@backend/db";
-import { eq, and, desc } from "drizzle-orm";
+import { eq, and, desc, inArray, sql } from "drizzle-orm";
 import { jwtAuthMiddleware } from "@/middleware/jwt-auth";
+import { parsePage } from "@/lib/pagination";
+import { timingSafeEqual } from "crypto";
+import { teamUserCache } from "@/lib/slack-token";
 
 const { slackEvents, slackConnections } = schema;
 
 const SLACK_SIGNING_SECRET = process.env.SLACK_SIGNING_SECRET || "";
+const EVENT_BATCH_MAX = parseInt(process.env.SLACK_EVENT_BATCH_MAX || "32");
+const EVENT_BATCH_WINDOW_MS = parseInt(process.env.SLACK_EVENT_BATCH_WINDOW_MS || "100");
+// Events that fail to store are retried after a delay, a few times at most
+const EVENT_RETRY_DELAY_MS = 1000;
+const EVENT_MAX_ATTEMPTS = 3;
+// Events queued or being written; past this, webhooks are refused so Slack
+// retries later instead of the backlog growing without bound
+const EVENT_QUEUE_MAX = parseInt(process.env.SLACK_EVENT_QUEUE_MAX || "1000");
+
+// Slack recommends rejecting requests older than five minutes (replay guard)
+const MAX_REQUEST_AGE_SECONDS = 5 * 60;
+const TIMESTAMP_PATTERN = /^\d+$/;
+
+type SlackEventRow = typeof slackEvents.$inferInsert;
+
+interface QueuedEvent {
+  row: SlackEventRow;
+  attempts: number;
+}
+
+const eventQueue: QueuedEvent[] = [];
+// Failed events waiting out EVENT_RETRY_DELAY_MS; kept apart from eventQueue
+// so a pending retry never holds back the batch window for new events
+const retryQueue: QueuedEvent[] = [];
+let eventsInFlight = 0;
+const activeFlushes: Set<Promise<void>> = new Set();
+
+let flushTimer: ReturnType<typeof setTimeout> | null = null;
+let retryTimer: ReturnType<typeof setTimeout> | null = null;
+
+// Keyed once at startup and copied per request, so the HMAC key schedule
+// (inner/outer pad hashing) isn't redone for every event. The template is
+// never digested; Bun only allows copy() on an unfinalized HMAC hasher
+const signingHmac = SLACK_SIGNING_SECRET
+  ? new Bun.CryptoHasher("sha256", SLACK_SIGNING_SECRET)
+  : null;
 
 /**
  * Verify Slack request signature
  */
 function verifySlackSignature(body: string, timestamp: string, signature: string): boolean {
-  if (!SLACK_SIGNING_SECRET) {
+  if (!signingHmac) {
     console.warn("SLACK_SIGNING_SECRET not set, skipping verification");
     return true;
   }
 
-  const baseString = `v0:${timestamp}:${body}`;
-  const hmac = new Bun.CryptoHasher("sha256", SLACK_SIGNING_SECRET);
-  hmac.update(baseString);
-  const expectedSignature = `v0=${hmac.digest("hex")}`;
+  // Reject malformed or stale timestamps before doing any hashing
+  if (
+    !TIMESTAMP_PATTERN.test(timestamp) ||
+    Math.abs(Date.now() / 1000 - Number(timestamp)) > MAX_REQUEST_AGE_SECONDS
+  ) {
+    return false;
+  }
 
-  return signature === expectedSignature;
+  // Fed in parts rather than building the `v0:{timestamp}:{body}` string,
+  // which would copy the whole body once more per request
+  const hmac = signingHmac.copy();
+  hmac.update("v0:");
+  hmac.update(timestamp);
+  hmac.update(":");
+  hmac.update(body);
+  const expected = Buffer.from(`v0=${hmac.digest("hex")}`);
+  const received = Buffer.from(signature);
+
+  // Timing-safe comparison
+  return received.length === expected.length && timingSafeEqual(received, expected);
 }
 
 export const slackEventsRoutes = new Elysia({ prefix: "/slack" })
@@ -31,7 +84,7 @@ export const slackEventsRoutes = new Elysia({ prefix: "/slack" })
 
   .post(
     "/events",
-    async ({ request, body }) => {
+    async ({ request, body, set }) => {
       const rawBody = JSON.stringify(body);
       const timestamp = request.headers.get("x-slack-request-timestamp") || "";
       const signature = request.headers.get("x-slack-signature") || "";
@@ -48,36 +101,14 @@ export const slackEventsRoutes = new Elysia({ prefix: "/slack" })
       }
 
       if (eventData.type === "event_callback") {
-        const { event, team_id, event_id, event_time } = eventData;
-
-        const existing = await db.query.slackEvents.findFirst({
-          where: eq(slackEvents.eventId, event_id),
-        });
-
-        if (existing) {
-          console.log(`⏭️ Duplicate event ${event_id}, skipping`);
-          return { success: true, message: "Duplicate event" };
+        // Slack retries if we don't ack within 3 seconds, so queue the
+        // event for a background batch insert and acknowledge immediately
+        if (!enqueueSlackEvent(eventData)) {
+          console.warn("⚠️ Slack event queue full, asking Slack to retry");
+          set.status = 503;
+          return { success: false, error: "Event queue full" };
         }
 
-        const connection = await db.query.slackConnections.findFirst({
-          where: eq(slackConnections.teamId, team_id),
-        });
-
-        await db.insert(slackEvents).values({
-          teamId: team_id,
-          userId: connection?.userId,
-          eventType: event.type,
-          eventId: event_id,
-          eventTimestamp: event_time.toString(),
-          channelId: event.channel || event.item?.channel,
-          channelType: event.channel_type,
-          userSlackId: event.user,
-          eventData: event,
-          processed: false,
-        });
-
-        console.log(`✅ Stored Slack event: ${event.type} (${event_id})`);
-
         return { success: true };
       }
 
@@ -110,7 +141,7 @@ export const slackEventsRoutes = new Elysia({ prefix: "/slack" })
         return { success: false, error: "Unauthorized" };
       }
 
-      const limit = parseInt(query.limit || "50");
+      const { limit, offset } = parsePage(query);
       const eventType = query.type;
 
       let conditions: any = eq(slackEvents.userId, user.id);
@@ -121,8 +152,19 @@ export const slackEventsRoutes = new Elysia({ prefix: "/slack" })
 
       const events = await db.query.slackEvents.findMany({
         where: conditions,
+        columns: {
+          id: true,
+          eventType: true,
+          channelId: true,
+          userSlackId: true,
+          teamId: true,
+          processed: true,
+          createdAt: true,
+          eventData: true,
+        },
         orderBy: [desc(slackEvents.createdAt)],
-        limit: limit,
+        limit,
+        offset,
       });
 
       return {
@@ -139,12 +181,15 @@ export const slackEventsRoutes = new Elysia({ prefix: "/slack" })
             preview: getEventPreview(e.eventData),
           })),
           count: events.length,
+          limit,
+          offset,
         },
       };
     },
     {
       query: t.Object({
         limit: t.Optional(t.String()),
+        offset: t.Optional(t.String()),
         type: t.Optional(t.String()),
       }),
     },
@@ -182,20 +227,31 @@ export const slackEventsRoutes = new Elysia({ prefix: "/slack" })
       return { success: false, error: "Unauthorized" };
     }
 
-    const events = await db.query.slackEvents.findMany({
-      where: eq(slackEvents.userId, user.id),
-    });
+    // Count in Postgres: one row per event type comes back instead of
+    // every event the user has ever received
+    const rows = await db
+      .select({
+        eventType: slackEvents.eventType,
+        total: sql<number>`count(*)::int`,
+        processed: sql<number>`count(*) filter (where ${slackEvents.processed})::int`,
+      })
+      .from(slackEvents)
+      .where(eq(slackEvents.userId, user.id))
+      .groupBy(slackEvents.eventType);
 
     const stats = {
-      total: events.length,
+      total: 0,
       byType: {} as Record<string, number>,
-      processed: events.filter((e) => e.processed).length,
-      unprocessed: events.filter((e) => !e.processed).length,
+      processed: 0,
+      unprocessed: 0,
     };
 
-    events.forEach((event) => {
-      stats.byType[event.eventType] = (stats.byType[event.eventType] || 0) + 1;
-    });
+    for (const row of rows) {
+      stats.total += row.total;
+      stats.processed += row.processed;
+      stats.byType[row.eventType] = row.total;
+    }
+    stats.unprocessed = stats.total - stats.processed;
 
     return {
       success: true,
@@ -248,3 +304,277 @@ function getEventPreview(eventData: any): string {
       return `Event: ${eventData.type}`;
   }
 }
+
+/**
+ * Queue a Slack event callback for storage
+ * Events arriving within a short window are written in a single batch
+ * Returns false, without queueing, when the backlog is full
+ */
+function enqueueSlackEvent(eventData: any): boolean {
+  if (backlogSize() >= EVENT_QUEUE_MAX) {
+    return false;
+  }
+
+  const row = toEventRow(eventData);
+  if (!row) {
+    // Malformed payloads would fail the same way on every Slack retry, so
+    // acknowledge and drop them here rather than poisoning a batch
+    console.error("❌ Dropping malformed Slack event:", eventData?.event_id);
+    return true;
+  }
+
+  eventQueue.push({ row, attempts: 0 });
+
+  if (eventQueue.length >= EVENT_BATCH_MAX) {
+    void flushSlackEvents();
+  } else if (!flushTimer) {
+    flushTimer = setTimeout(() => void flushSlackEvents(), EVENT_BATCH_WINDOW_MS);
+  }
+
+  return true;
+}
+
+/**
+ * Events queued, waiting to be retried, or being written
+ */
+function backlogSize(): number {
+  return eventQueue.length + retryQueue.length + eventsInFlight;
+}
+
+/**
+ * Map a Slack event callback to a slack_events row
+ * Returns null when required fields are missing; userId is filled at flush
+ */
+function toEventRow(eventData: any): SlackEventRow | null {
+  const { event, team_id, event_id, event_time } = eventData ?? {};
+
+  if (
+    !event?.type ||
+    typeof team_id !== "string" ||
+    typeof event_id !== "string" ||
+    typeof event_time !== "number"
+  ) {
+    return null;
+  }
+
+  return {
+    teamId: team_id,
+    userId: null,
+    eventType: event.type,
+    eventId: event_id,
+    eventTimestamp: event_time.toString(),
+    channelId: event.channel || event.item?.channel,
+    channelType: event.channel_type,
+    userSlackId: event.user,
+    eventData: event,
+    processed: false,
+  };
+}
+
+/**
+ * Store all queued Slack events with one connection lookup and one insert
+ * Duplicates (Slack retries) are skipped by the unique event_id. If the
+ * batch insert fails, rows are retried one by one so a single bad row
+ * doesn't sink the rest, and rows that still fail are re-queued
+ */
+function flushSlackEvents(): Promise<void> {
+  if (flushTimer) {
+    clearTimeout(flushTimer);
+    flushTimer = null;
+  }
+
+  const batch = eventQueue.splice(0, eventQueue.length);
+  if (batch.length === 0) {
+    return Promise.resolve();
+  }
+
+  eventsInFlight += batch.length;
+
+  // Move the batch out of eventsInFlight before re-queueing any failures,
+  // so the backlog count stays exact whatever happens while storing
+  const flush = storeSlackEvents(batch)
+    .catch((error) => {
+      console.error(`❌ Error storing ${batch.length} Slack event(s):`, error);
+      return batch;
+    })
+    .then((failed) => {
+      eventsInFlight -= batch.length;
+      requeueSlackEvents(failed);
+    })
+    .finally(() => {
+      activeFlushes.delete(flush);
+    });
+  activeFlushes.add(flush);
+
+  return flush;
+}
+
+/**
+ * Insert a batch, returning the events that could not be stored
+ */
+async function storeSlackEvents(batch: QueuedEvent[]): Promise<QueuedEvent[]> {
+  try {
+    await resolveTeamUsers(batch);
+  } catch (error) {
+    console.error(`❌ Error resolving Slack teams for ${batch.length} event(s):`, error);
+    return batch;
+  }
+
+  try {
+    const inserted = await db
+      .insert(slackEvents)
+      .values(batch.map(({ row }) => row))
+      .onConflictDoNothing({ target: slackEvents.eventId })
+      .returning({ id: slackEvents.id });
+
+    const skipped = batch.length - inserted.length;
+    console.log(
+      `✅ Stored ${inserted.length} Slack event(s)${skipped ? `, skipped ${skipped} duplicate(s)` : ""}`
+    );
+    return [];
+  } catch (error) {
+    console.error(`❌ Batch insert of ${batch.length} Slack event(s) failed, retrying individually:`, error);
+  }
+
+  const failed: QueuedEvent[] = [];
+
+  for (const queued of batch) {
+    try {
+      await db
+        .insert(slackEvents)
+        .values(queued.row)
+        .onConflictDoNothing({ target: slackEvents.eventId });
+    } catch (error) {
+      console.error(`❌ Error storing Slack event ${queued.row.eventId}:`, error);
+      failed.push(queued);
+    }
+  }
+
+  console.log(`✅ Stored ${batch.length - failed.length} of ${batch.length} Slack event(s) individually`);
+
+  return failed;
+}
+
+/**
+ * Fill in the owning user for each queued row, querying only teams that
+ * aren't cached
+ */
+async function resolveTeamUsers(batch: QueuedEvent[]): Promise<void> {
+  const userByTeam = new Map<string, string>();
+  const uncachedTeamIds: string[] = [];
+
+  for (const teamId of new Set(batch.map(({ row }) => row.teamId))) {
+    const userId = teamUserCache.get(teamId);
+    if (userId) {
+      userByTeam.set(teamId, userId);
+    } else {
+      uncachedTeamIds.push(teamId);
+    }
+  }
+
+  if (uncachedTeamIds.length > 0) {
+    const connections = await db
+      .select({ teamId: slackConnections.teamId, userId: slackConnections.userId })
+      .from(slackConnections)
+      .where(inArray(slackConnections.teamId, uncachedTeamIds));
+
+    for (const { teamId, userId } of connections) {
+      if (userId) {
+        teamUserCache.set(teamId, userId);
+        userByTeam.set(teamId, userId);
+      }
+    }
+  }
+
+  for (const queued of batch) {
+    queued.row.userId = userByTeam.get(queued.row.teamId) ?? null;
+  }
+}
+
+/**
+ * Hold failed events for a delayed retry, dropping any that have used up
+ * their attempts
+ * Called after the batch has left eventsInFlight, so held events count
+ * against EVENT_QUEUE_MAX again and never take the backlog past it
+ */
+function requeueSlackEvents(failed: QueuedEvent[]): void {
+  const retryable = failed.filter((queued) => ++queued.attempts < EVENT_MAX_ATTEMPTS);
+
+  if (retryable.length < failed.length) {
+    logDroppedSlackEvents(
+      failed.filter((queued) => queued.attempts >= EVENT_MAX_ATTEMPTS),
+      `failed ${EVENT_MAX_ATTEMPTS} attempts`,
+    );
+  }
+
+  const room = Math.max(EVENT_QUEUE_MAX - backlogSize(), 0);
+  const held = retryable.slice(0, room);
+
+  if (held.length < retryable.length) {
+    logDroppedSlackEvents(retryable.slice(room), "queue is full");
+  }
+
+  if (held.length === 0) {
+    return;
+  }
+
+  retryQueue.push(...held);
+
+  if (!retryTimer) {
+    retryTimer = setTimeout(retrySlackEvents, EVENT_RETRY_DELAY_MS);
+  }
+}
+
+/**
+ * Move held events to the front of the queue and write them out
+ */
+function retrySlackEvents(): void {
+  if (retryTimer) {
+    clearTimeout(retryTimer);
+    retryTimer = null;
+  }
+
+  eventQueue.unshift(...retryQueue.splice(0, retryQueue.length));
+  void flushSlackEvents();
+}
+
+/**
+ * Log events that will never be stored, with enough of each payload to
+ * replay them by hand: they were already acknowledged to Slack, so it won't
+ * redeliver them
+ */
+function logDroppedSlackEvents(dropped: QueuedEvent[], reason: string): void {
+  console.error(`❌ Dropping ${dropped.length} Slack event(s): ${reason}`);
+
+  for (const { row } of dropped) {
+    console.error(
+      "❌ Dropped Slack event:",
+      JSON.stringify({
+        eventId: row.eventId,
+        teamId: row.teamId,
+        eventType: row.eventType,
+        eventTimestamp: row.eventTimestamp,
+        eventData: row.eventData,
+      }),
+    );
+  }
+}
+
+/**
+ * Write out queued and held events and wait for in-flight batches (for
+ * shutdown); held events get their last try now rather than after the delay
+ */
+export async function drainSlackEvents(): Promise<void> {
+  retrySlackEvents();
+  await Promise.all(activeFlushes);
+
+  if (retryTimer) {
+    clearTimeout(retryTimer);
+    retryTimer = null;
+  }
+
+  const unstored = [...eventQueue, ...retryQueue];
+  if (unstored.length > 0) {
+    logDroppedSlackEvents(unstored, "not stored before shutdown");
+  }
+}
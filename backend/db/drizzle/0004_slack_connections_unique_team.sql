@@ -0,0 +1,9 @@
+-- Keep only the most recently updated row per team_id; the old
+-- check-then-insert path could race and create duplicates
+DELETE FROM "slack_connections" AS "older"
+USING "slack_connections" AS "newer"
+WHERE "older"."team_id" = "newer"."team_id"
+  AND (COALESCE("older"."updated_at", "older"."created_at", 'epoch'::timestamp), "older"."id")
+    < (COALESCE("newer"."updated_at", "newer"."created_at", 'epoch'::timestamp), "newer"."id");--> statement-breakpoint
+DROP INDEX "slack_connections_team_id_idx";--> statement-breakpoint
+CREATE UNIQUE INDEX "slack_connections_team_id_idx" ON "slack_connections" USING btree ("team_id");
\ No newline at end of file
@@ -0,0 +1 @@
+CREATE INDEX "linear_connections_organization_id_idx" ON "linear_connections" USING btree ("linear_organization_id");
\ No newline at end of file
@@ -0,0 +1,9 @@
+-- Keep only the most recently updated row per installation_id; the old
+-- check-then-insert path could race and create duplicates
+DELETE FROM "github_installations" AS "older"
+USING "github_installations" AS "newer"
+WHERE "older"."installation_id" = "newer"."installation_id"
+  AND (COALESCE("older"."updated_at", "older"."created_at", 'epoch'::timestamp), "older"."id")
+    < (COALESCE("newer"."updated_at", "newer"."created_at", 'epoch'::timestamp), "newer"."id");--> statement-breakpoint
+DROP INDEX "github_installations_installation_id_idx";--> statement-breakpoint
+CREATE UNIQUE INDEX "github_installations_installation_id_idx" ON "github_installations" USING btree ("installation_id");
\ No newline at end of file
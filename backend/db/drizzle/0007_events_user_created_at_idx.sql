@@ -0,0 +1,2 @@
+CREATE INDEX "slack_events_user_id_created_at_idx" ON "slack_events" USING btree ("user_id","created_at");--> statement-breakpoint
+CREATE INDEX "linear_events_user_id_created_at_idx" ON "linear_events" USING btree ("user_id","created_at");
\ No newline at end of file
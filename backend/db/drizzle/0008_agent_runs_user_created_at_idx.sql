@@ -0,0 +1 @@
+CREATE INDEX "agent_runs_user_id_created_at_idx" ON "agent_runs" USING btree ("user_id","created_at");
\ No newline at end of file
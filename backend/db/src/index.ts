@@ -2,8 +2,23 @@ import { drizzle } from "drizzle-orm/node-postgres";
 import { Pool } from "pg";
 import * as schema from "./schema";
 
+// Size the pool explicitly so bursts of webhooks queue briefly for a
+// connection instead of piling up without limit
 const pool = new Pool({
   connectionString: process.env.DATABASE_URL,
+  max: parseInt(process.env.DB_POOL_MAX || "20"),
+  idleTimeoutMillis: parseInt(process.env.DB_POOL_IDLE_TIMEOUT_MS || "30000"),
+  connectionTimeoutMillis: parseInt(process.env.DB_POOL_CONNECTION_TIMEOUT_MS || "5000"),
+  // Detect dead connections at the TCP level, and recycle long-lived ones so
+  // they don't outlive a Postgres restart or failover
+  keepAlive: true,
+  maxLifetimeSeconds: parseInt(process.env.DB_POOL_MAX_LIFETIME_SECONDS || "1800"),
+});
+
+// An idle client losing its connection (e.g. Postgres restarted) emits an
+// error on the pool; without a listener that crashes the process
+pool.on("error", (error) => {
+  console.error("❌ Idle Postgres client error:", error);
 });
 
 export const db = drizzle(pool, { schema });
@@ -9,6 +9,7 @@ import {
   jsonb,
   decimal,
   index,
+  uniqueIndex,
 } from "drizzle-orm/pg-core";
 
 // ==========================================
@@ -189,7 +190,8 @@ export const githubInstallations = pgTable(
     updatedAt: timestamp("updated_at").defaultNow(),
   },
   (table) => ({
-    installationIdIdx: index("github_installations_installation_id_idx").on(table.installationId),
+    // One row per installation; lets the webhook upsert on installation_id
+    installationIdIdx: uniqueIndex("github_installations_installation_id_idx").on(table.installationId),
     userIdIdx: index("github_installations_user_id_idx").on(table.userId),
   }),
 );
@@ -214,7 +216,8 @@ export const slackConnections = pgTable(
   },
   (table) => ({
     userIdIdx: index("slack_connections_user_id_idx").on(table.userId),
-    teamIdIdx: index("slack_connections_team_id_idx").on(table.teamId),
+    // One connection per workspace; lets the OAuth flow upsert on team_id
+    teamIdIdx: uniqueIndex("slack_connections_team_id_idx").on(table.teamId),
   }),
 );
 
@@ -240,6 +243,8 @@ export const linearConnections = pgTable(
   (table) => ({
     userIdIdx: index("linear_connections_user_id_idx").on(table.userId),
     linearUserIdIdx: index("linear_connections_linear_user_id_idx").on(table.linearUserId),
+    // Every Linear webhook resolves its connection by organization
+    linearOrganizationIdIdx: index("linear_connections_organization_id_idx").on(table.linearOrganizationId),
   }),
 );
 
@@ -286,6 +291,8 @@ export const slackEvents = pgTable(
     eventIdIdx: index("slack_events_event_id_idx").on(table.eventId),
     processedIdx: index("slack_events_processed_idx").on(table.processed),
     createdAtIdx: index("slack_events_created_at_idx").on(table.createdAt),
+    // Per-user event lists: filter by user, newest first
+    userIdCreatedAtIdx: index("slack_events_user_id_created_at_idx").on(table.userId, table.createdAt),
   }),
 );
 
@@ -325,6 +332,8 @@ export const linearEvents = pgTable(
     processedIdx: index("linear_events_processed_idx").on(table.processed),
     shouldAiReactIdx: index("linear_events_should_ai_react_idx").on(table.shouldAiReact),
     createdAtIdx: index("linear_events_created_at_idx").on(table.createdAt),
+    // Per-user event lists: filter by user, newest first
+    userIdCreatedAtIdx: index("linear_events_user_id_created_at_idx").on(table.userId, table.createdAt),
   }),
 );
 
@@ -382,6 +391,8 @@ export const agentRuns = pgTable(
   (table) => ({
     userIdIdx: index("agent_runs_user_id_idx").on(table.userId),
     statusIdx: index("agent_runs_status_idx").on(table.status),
+    // Run history: filter by user, newest first
+    userIdCreatedAtIdx: index("agent_runs_user_id_created_at_idx").on(table.userId, table.createdAt),
   }),
 );
 